@@ -0,0 +1,187 @@
+import glob
+import json
+import os
+import re
+import threading
+import time
+import DCSLM.Utilities as Utilities
+
+
+class ArchiveCache:
+  def __init__(self, folderRoot="DCSLM"):
+    self.FolderRoot = folderRoot
+    self.Index = self.make_default_index()
+    self.IndexChanged = False
+    self.PinnedBlobs = {}
+    self.lock = threading.RLock()
+
+  def make_default_index(self):
+    index = {
+      "blobs": {},
+      "ids": {},
+      "urls": {},
+      "size": 0
+    }
+    return index
+
+  def get_archives_path(self):
+    return os.path.join(os.getcwd(), self.FolderRoot, "archives")
+
+  def get_index_path(self):
+    return os.path.join(self.get_archives_path(), "index.json")
+
+  def get_blob_path(self, archiveHash):
+    return os.path.join(self.get_archives_path(), self.Index['blobs'][archiveHash]['file'])
+
+  def has_index(self):
+    return os.path.isfile(self.get_index_path())
+
+  def load_index(self):
+    indexPath = self.get_index_path()
+    with self.lock:
+      self.Index = self.make_default_index()
+      if os.path.isfile(indexPath):
+        try:
+          with open(indexPath, "r") as indexFile:
+            indexData = json.load(indexFile)
+            for k in self.Index.keys():
+              if k in indexData.keys():
+                self.Index[k] = indexData[k]
+        except:
+          raise RuntimeError("Unable to open archive cache index at \'" + indexPath + "\'")
+    return self.Index
+
+  def write_index(self):
+    indexPath = self.get_index_path()
+    with self.lock:
+      try:
+        with open(indexPath, "w") as indexFile:
+          json.dump(self.Index, indexFile, indent=4)
+        self.IndexChanged = False
+      except:
+        raise RuntimeError("Unable to write archive cache index to \'" + indexPath + "\'")
+
+  def _make_blob_filename(self, archiveHash, archiveName):
+    archiveExt = os.path.splitext(archiveName)[1]
+    if os.path.splitext(os.path.splitext(archiveName)[0])[1].lower() == ".tar": # Keep .tar.gz style extensions
+      archiveExt = ".tar" + archiveExt
+    return str.split(archiveHash, ':')[-1] + archiveExt
+
+  def flush_index(self):
+    with self.lock:
+      if self.IndexChanged:
+        self.write_index()
+
+  def pin(self, archiveHash):
+    with self.lock:
+      self.PinnedBlobs[archiveHash] = self.PinnedBlobs.get(archiveHash, 0) + 1
+
+  def unpin(self, archiveHash):
+    with self.lock:
+      if archiveHash in self.PinnedBlobs.keys():
+        self.PinnedBlobs[archiveHash] -= 1
+        if self.PinnedBlobs[archiveHash] <= 0:
+          del self.PinnedBlobs[archiveHash]
+
+  def is_pinned(self, archiveHash):
+    with self.lock:
+      return archiveHash in self.PinnedBlobs.keys()
+
+  def lookup(self, dcsufID=None, url=None, pin=False):
+    with self.lock:
+      archiveHash = None
+      if url and url in self.Index['urls'].keys():
+        archiveHash = self.Index['urls'][url]
+      elif dcsufID and str(dcsufID) in self.Index['ids'].keys():
+        archiveHash = self.Index['ids'][str(dcsufID)]
+      if not archiveHash or archiveHash not in self.Index['blobs'].keys():
+        return None
+      blobPath = self.get_blob_path(archiveHash)
+      if not os.path.isfile(blobPath):
+        self._remove_blob(archiveHash)
+        self.IndexChanged = True
+        return None
+      blobData = self.Index['blobs'][archiveHash]
+      blobData['last_used'] = time.time() # Written out with the next store or flush_index()
+      self.IndexChanged = True
+      if pin:
+        self.pin(archiveHash)
+      return {'hash': archiveHash, 'path': blobPath, 'size': blobData['size'], 'name': blobData['name']}
+
+  def is_cached_archive(self, archivePath):
+    if archivePath:
+      with self.lock:
+        archiveFilename = os.path.split(archivePath)[1]
+        for b in self.Index['blobs'].values():
+          if b['file'] == archiveFilename:
+            return os.path.normpath(os.path.split(archivePath)[0]) == os.path.normpath(self.get_archives_path())
+    return False
+
+  def store(self, archivePath, archiveHash, dcsufID=None, url=None, maxSize=0, pin=False):
+    with self.lock:
+      archiveName = os.path.split(archivePath)[1]
+      if archiveHash in self.Index['blobs'].keys() and os.path.isfile(self.get_blob_path(archiveHash)):
+        blobPath = self.get_blob_path(archiveHash)
+        if os.path.normpath(blobPath) != os.path.normpath(archivePath):
+          Utilities.remove_file(archivePath) # Identical content is already stored
+      else:
+        blobFilename = self._make_blob_filename(archiveHash, archiveName)
+        blobPath = os.path.join(self.get_archives_path(), blobFilename)
+        os.replace(archivePath, blobPath)
+        self.Index['blobs'][archiveHash] = {'file': blobFilename, 'name': archiveName,
+                                            'size': os.path.getsize(blobPath), 'last_used': 0}
+        self.Index['size'] += self.Index['blobs'][archiveHash]['size']
+      self.Index['blobs'][archiveHash]['last_used'] = time.time()
+      if dcsufID:
+        self.Index['ids'][str(dcsufID)] = archiveHash
+      if url:
+        self.Index['urls'][url] = archiveHash
+      if pin:
+        self.pin(archiveHash)
+      self.evict(maxSize, keepHash=archiveHash)
+      self.write_index()
+      return blobPath
+
+  def _remove_blob(self, archiveHash):
+    blobData = self.Index['blobs'].pop(archiveHash)
+    self.Index['size'] = max(0, self.Index['size'] - blobData['size'])
+    for k in ['ids', 'urls']:
+      for r in [r for r, h in self.Index[k].items() if h == archiveHash]:
+        del self.Index[k][r]
+    return blobData
+
+  def evict(self, maxSize, keepHash=None):
+    evictedBlobs = []
+    if maxSize <= 0:
+      return evictedBlobs
+    with self.lock:
+      lruBlobs = sorted(self.Index['blobs'].items(), key=lambda b: b[1]['last_used'])
+      for archiveHash, blobData in lruBlobs:
+        if self.Index['size'] <= maxSize:
+          break
+        if archiveHash == keepHash or self.is_pinned(archiveHash): # Pinned blobs are still being extracted
+          continue
+        blobPath = self.get_blob_path(archiveHash)
+        if os.path.isfile(blobPath):
+          Utilities.remove_file(blobPath)
+        evictedBlobs.append(self._remove_blob(archiveHash))
+        self.IndexChanged = True
+    return evictedBlobs
+
+  def get_stats(self):
+    with self.lock:
+      return len(self.Index['blobs']), self.Index['size']
+
+  def import_legacy_archives(self):
+    importedArchives = []
+    legacyFiles = glob.glob(self.get_archives_path() + "/*.*")
+    for f in legacyFiles:
+      archiveName = os.path.split(f)[1]
+      if archiveName == "index.json" or archiveName.endswith(".part") or archiveName.endswith(".part.json"):
+        continue
+      archiveHash = Utilities.format_hash(Utilities.update_hash_from_file(Utilities.make_archive_hasher(), f))
+      legacyID = re.match(r"([0-9]+)_", archiveName) # Kept archives used to be saved as <id>_<filename>
+      dcsufID = legacyID.group(1) if legacyID else None
+      importedArchives.append(self.store(f, archiveHash, dcsufID=dcsufID)) # Never evict archives the user kept
+    self.write_index()
+    return importedArchives
@@ -89,8 +89,13 @@ class DCSUFParser:
       else:
         raise RuntimeError(fullArchiveUrl + " is not a valid url to an archive file.")
 
-  def make_request_session(self):
-    return requests.Session()
+  def make_request_session(self, poolSize=None):
+    session = requests.Session()
+    if poolSize:
+      poolAdapter = requests.adapters.HTTPAdapter(pool_connections=poolSize, pool_maxsize=poolSize)
+      session.mount("https://", poolAdapter)
+      session.mount("http://", poolAdapter)
+    return session
 
   def _request_html_from_url(self, url, session=None):
     try:
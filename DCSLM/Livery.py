@@ -96,6 +96,7 @@ class DCSUserFile:
 class Livery:
   def __init__(self):
     self.archive = None
+    self.archive_hash = None
     self.ovgme = None
     self.destination = None
     self.dcsuf = DCSUserFile()
@@ -150,10 +151,15 @@ class Livery:
     return ", ".join([u.friendly for u in self.installs['units']])
 
   def calculate_size_installed_liveries(self):
+    seenFiles = set() # Files linked between this livery's unit folders are only counted once
     for i, v in self.installs['liveries'].items():
       v['size'] = 0
+      v['unique_size'] = 0
+      v.pop('global_unique_size', None) # Only known again after the next optimize --global
       for p in v['paths']:
-        v['size'] += Utilities.get_size_of_directory(os.path.join(os.getcwd(), self.destination, p))
+        installPath = os.path.join(os.getcwd(), self.destination, p)
+        v['size'] += Utilities.get_size_of_directory(installPath)
+        v['unique_size'] += Utilities.get_unique_size_of_directory(installPath, seenFiles)
 
   def get_size_installed_liveries(self):
     totalSize = 0
@@ -161,5 +167,18 @@ class Livery:
       totalSize += v['size']
     return totalSize
 
+  def get_unique_size_installed_liveries(self):
+    totalSize = 0
+    for i, v in self.installs['liveries'].items():
+      totalSize += v.get('unique_size', v['size'])
+    return totalSize
+
+  def get_global_unique_size_installed_liveries(self):
+    totalSize = None
+    for i, v in self.installs['liveries'].items():
+      if 'global_unique_size' in v.keys():
+        totalSize = (totalSize or 0) + v['global_unique_size']
+    return totalSize
+
   def is_optimized(self):
     return self.installs['optimized']
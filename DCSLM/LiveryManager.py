@@ -3,21 +3,49 @@ import json
 import os
 import shutil
 import re
+import threading
+import time
+import zipfile
+import zlib
 import patoolib
 import requests
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import DCSLM.Utilities as Utilities
 from pprint import pprint
+from .ArchiveCache import ArchiveCache
 from .DCSUFParser import DCSUFParser
 from .Livery import Livery
 from .UnitManager import UM
 
+try:
+  import py7zr
+  InProcessArchiveErrors = (zipfile.BadZipFile, NotImplementedError, py7zr.exceptions.ArchiveError)
+except ImportError:
+  py7zr = None
+  InProcessArchiveErrors = (zipfile.BadZipFile, NotImplementedError)
+
+ZipMemberReadErrors = (zipfile.BadZipFile, NotImplementedError, RuntimeError, EOFError, zlib.error)
+ZipReadableCompressTypes = [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED]
+try:
+  import bz2
+  ZipReadableCompressTypes.append(zipfile.ZIP_BZIP2)
+except ImportError:
+  pass
+try:
+  import lzma
+  ZipReadableCompressTypes.append(zipfile.ZIP_LZMA)
+except ImportError:
+  pass
+
 
 class LiveryManager:
   def __init__(self):
     self.LiveryData = self.make_default_data()
     self.Liveries = {}
     self.FolderRoot = "DCSLM"
+    self.ArchiveCache = ArchiveCache(self.FolderRoot)
     self.console = None
     self.IDLocalMax = 3000000
     self.IDLocalLast = 1000000
@@ -31,13 +59,39 @@ class LiveryManager:
   def make_default_data(self):
     ld = {
       "config": {
-        "ovgme": False
+        "ovgme": False,
+        "fetch_workers": 4,
+        "download_workers": 2,
+        "extract_workers": 2,
+        "check_workers": 8,
+        "download_segments": 1,
+        "archive_cache_mb": 5000,
+        "selective_extract": True,
+        "direct_install": True,
+        "link_installs": True,
+        "copy_workers": 4,
+        "hash_workers": 4,
+        "hash_algorithm": "md5"
       },
       "liveries": {},
       "last_update": 0,
     }
     return ld
 
+  def get_config_value(self, configName):
+    if configName in self.LiveryData['config'].keys():
+      return self.LiveryData['config'][configName]
+    defaultConfig = self.make_default_data()['config']
+    if configName in defaultConfig.keys():
+      return defaultConfig[configName]
+    raise RuntimeError("Unknown DCSLM config setting \'" + configName + "\'")
+
+  def get_config_workers(self, configName):
+    try:
+      return max(1, int(self.get_config_value(configName)))
+    except (TypeError, ValueError):
+      return max(1, int(self.make_default_data()['config'][configName]))
+
   def clear_data(self):
     self.LiveryData = self.make_default_data()
     self.Liveries = {}
@@ -48,6 +102,10 @@ class LiveryManager:
       try:
         with open(configPath, "r") as configFile:
           configData = json.load(configFile)
+          if 'config' in configData.keys():
+            for c, v in self.make_default_data()['config'].items():
+              if c not in configData['config'].keys():
+                configData['config'][c] = v
           for id,l in configData['liveries'].items():
             livery = Livery().from_JSON(l)
             self.Liveries[id] = livery
@@ -64,9 +122,9 @@ class LiveryManager:
         for k,v in self.LiveryData.items():
           outJson[k] = v
         json.dump(outJson, configFile, indent=4)
-        return outJson
     except:
       raise RuntimeError("Unable to write DCSLM config file to \'" + configPath + "\'")
+    return outJson
 
   def make_dcslm_dirs(self):
     dcslmPath = os.path.join(os.getcwd(), self.FolderRoot)
@@ -82,6 +140,191 @@ class LiveryManager:
     except:
       raise RuntimeError("Unable to create DCSLM directories at \'" + dcslmPath + "\\\'")
 
+  def get_install_journal_path(self):
+    return os.path.join(os.getcwd(), self.FolderRoot, "install_journal.json")
+
+  def get_staging_path(self, livery):
+    return os.path.join(os.getcwd(), self.FolderRoot, "staging", str(livery.dcsuf.id))
+
+  def _read_install_journal(self):
+    journalPath = self.get_install_journal_path()
+    if os.path.isfile(journalPath):
+      try:
+        with open(journalPath, "r") as journalFile:
+          journal = json.load(journalFile)
+        if isinstance(journal, dict):
+          return journal
+      except (IOError, ValueError):
+        pass
+      try: # Moved aside so an unreadable journal is only reported once and never blocks installs
+        os.replace(journalPath, journalPath + ".corrupt")
+      except OSError:
+        raise RuntimeError("Unable to open install journal at \'" + journalPath + "\'")
+      self.print("Unable to read install journal, moved it to \'" + journalPath + ".corrupt\' and started a new one.",
+                 style="warn")
+    return {}
+
+  def _write_install_journal(self, journal):
+    journalPath = self.get_install_journal_path()
+    if not len(journal):
+      if os.path.isfile(journalPath):
+        Utilities.remove_file(journalPath)
+      return
+    try:
+      with open(journalPath + ".tmp", "w") as journalFile:
+        json.dump(journal, journalFile, indent=4)
+      os.replace(journalPath + ".tmp", journalPath)
+    except:
+      raise RuntimeError("Unable to write install journal to \'" + journalPath + "\'")
+
+  def _update_install_journal(self, liveryID, journalEntry=None):
+    journal = self._read_install_journal()
+    if journalEntry:
+      journal[str(liveryID)] = journalEntry
+    elif str(liveryID) in journal.keys():
+      del journal[str(liveryID)]
+    self._write_install_journal(journal)
+
+  def _remove_staging_directory(self, stagingPath):
+    if os.path.isdir(stagingPath) and Utilities.validate_remove_path(stagingPath):
+      shutil.rmtree(stagingPath, onerror=Utilities.remove_readonly)
+
+  def begin_staged_install(self, livery):
+    stagingPath = self.get_staging_path(livery)
+    self._remove_staging_directory(stagingPath)
+    os.makedirs(stagingPath, exist_ok=True)
+    self._update_install_journal(livery.dcsuf.id, {'state': "staging", 'staging': stagingPath, 'paths': []})
+    return stagingPath
+
+  def _get_registry_livery_id(self, installRoot):
+    registryPath = os.path.join(installRoot, ".dcslm.json")
+    if os.path.isfile(registryPath):
+      try:
+        with open(registryPath, "r") as registryFile:
+          return str(json.load(registryFile)['dcsuf']['id'])
+      except (IOError, ValueError, KeyError, TypeError):
+        return None
+    return None
+
+  def _get_staged_install_paths(self, livery, stagingPath):
+    stagedPaths = []
+    for i, v in livery.installs['liveries'].items():
+      for p in v['paths']:
+        finalPath = os.path.join(os.getcwd(), livery.destination, p)
+        # Only this livery's own folders are replaced, shared data and other liveries' folders get overlaid
+        mergePath = v.get('data', False) or self._get_registry_livery_id(finalPath) != str(livery.dcsuf.id)
+        stagedPaths.append({'staged': os.path.join(stagingPath, livery.destination, p),
+                            'final': finalPath,
+                            'old': os.path.join(stagingPath, ".old", livery.destination, p),
+                            'merge': mergePath})
+    return stagedPaths
+
+  def _move_path(self, srcPath, dstPath):
+    os.makedirs(os.path.split(dstPath)[0], exist_ok=True)
+    try:
+      os.replace(srcPath, dstPath)
+    except OSError: # Staging and destination are on different volumes
+      shutil.move(srcPath, dstPath)
+
+  def _merge_staged_directory(self, stagedPath, movedFiles):
+    for root, dirs, files in os.walk(stagedPath['staged']):
+      relativeRoot = os.path.relpath(root, stagedPath['staged'])
+      for f in files:
+        finalFilepath = os.path.normpath(os.path.join(stagedPath['final'], relativeRoot, f))
+        oldFilepath = os.path.normpath(os.path.join(stagedPath['old'], relativeRoot, f))
+        if os.path.isfile(finalFilepath) and not os.path.exists(oldFilepath): # Overwritten files are kept until commit
+          self._move_path(finalFilepath, oldFilepath)
+        self._move_path(os.path.join(root, f), finalFilepath)
+        movedFiles.append((finalFilepath, os.path.join(root, f)))
+    self._remove_staging_directory(stagedPath['staged'])
+
+  def _undo_staged_directory(self, stagedPath, movedFiles):
+    if not stagedPath.get('merge'):
+      if os.path.isdir(stagedPath['final']) and not os.path.isdir(stagedPath['staged']):
+        self._move_path(stagedPath['final'], stagedPath['staged'])
+      if os.path.isdir(stagedPath['old']):
+        self._move_path(stagedPath['old'], stagedPath['final'])
+      return
+    for finalFilepath, stagedFilepath in reversed(movedFiles):
+      self._move_path(finalFilepath, stagedFilepath)
+    for root, dirs, files in os.walk(stagedPath['old']):
+      relativeRoot = os.path.relpath(root, stagedPath['old'])
+      for f in files:
+        self._move_path(os.path.join(root, f), os.path.normpath(os.path.join(stagedPath['final'], relativeRoot, f)))
+
+  def _finish_staged_install(self, stagedPaths):
+    movedPaths = []
+    try:
+      for p in stagedPaths:
+        if not os.path.isdir(p['staged']): # Already moved into place
+          continue
+        movedFiles = []
+        movedPaths.append((p, movedFiles))
+        if p.get('merge') and os.path.isdir(p['final']):
+          self._merge_staged_directory(p, movedFiles)
+          continue
+        p['merge'] = False
+        if os.path.isdir(p['final']) and not os.path.isdir(p['old']):
+          self._move_path(p['final'], p['old'])
+        self._move_path(p['staged'], p['final'])
+    except:
+      for p, movedFiles in reversed(movedPaths):
+        self._undo_staged_directory(p, movedFiles)
+      raise
+
+  def commit_staged_install(self, livery, stagingPath):
+    stagedPaths = self._get_staged_install_paths(livery, stagingPath)
+    journalEntry = {'state': "committing", 'staging': stagingPath, 'paths': stagedPaths, 'livery': livery.to_JSON()}
+    self._update_install_journal(livery.dcsuf.id, journalEntry)
+    try:
+      self._finish_staged_install(stagedPaths)
+    except:
+      self._update_install_journal(livery.dcsuf.id, {'state': "staging", 'staging': stagingPath, 'paths': []})
+      raise
+    self.register_livery(livery)
+    journalEntry['state'] = "committed"
+    self._update_install_journal(livery.dcsuf.id, journalEntry)
+    self._remove_staging_directory(stagingPath)
+    self.write_data() # Registration is saved, committed journal entries aren't needed anymore
+    self._clear_committed_installs()
+
+  def rollback_staged_install(self, livery):
+    journal = self._read_install_journal()
+    journalEntry = journal.get(str(livery.dcsuf.id))
+    if journalEntry and journalEntry['state'] == "staging":
+      self._remove_staging_directory(journalEntry['staging'])
+      self._update_install_journal(livery.dcsuf.id)
+      return True
+    return False
+
+  def _clear_committed_installs(self):
+    journal = self._read_install_journal()
+    committedIDs = [i for i, j in journal.items() if j['state'] == "committed"]
+    if len(committedIDs):
+      for i in committedIDs:
+        del journal[i]
+      self._write_install_journal(journal)
+
+  def recover_staged_installs(self):
+    recoveredInstalls = []
+    journal = self._read_install_journal()
+    for liveryID, journalEntry in journal.items():
+      if journalEntry['state'] == "staging": # Never finished writing files, nothing was moved into Liveries
+        self._remove_staging_directory(journalEntry['staging'])
+        recoveredInstalls.append({'id': liveryID, 'title': None, 'action': "rolled back"})
+        continue
+      livery = Livery().from_JSON(journalEntry['livery'])
+      if journalEntry['state'] == "committing":
+        self._finish_staged_install(journalEntry['paths'])
+        self._remove_staging_directory(journalEntry['staging'])
+      if not self.is_livery_registered(liveryID):
+        self.register_livery(livery)
+      recoveredInstalls.append({'id': liveryID, 'title': livery.dcsuf.title, 'action': "finished"})
+    if len(recoveredInstalls):
+      self.write_data() # Save recovered registrations before the journal entries are dropped
+      self._write_install_journal({})
+    return recoveredInstalls
+
   def get_registered_livery(self, id=None, livery=None):
     userID = id
     if livery:
@@ -129,6 +372,8 @@ class LiveryManager:
     return False
 
   def uninstall_livery(self, livery, keepFiles=False):
+    if livery.get_global_unique_size_installed_liveries() is not None: # Other liveries may have counted its files
+      self.clear_global_unique_sizes()
     if not keepFiles:
       self.remove_installed_livery_directories(livery)
     else:
@@ -148,10 +393,10 @@ class LiveryManager:
     else:
       raise RuntimeError("Unable to find livery registry file \'" + registryPath + "\'.")
 
-  def write_livery_registry_files(self, livery):
+  def write_livery_registry_files(self, livery, stagingPath=None):
     for i, v in livery.installs['liveries'].items():
       for p in v['paths']:
-        installRoot = os.path.join(os.getcwd(), livery.destination, p)
+        installRoot = os.path.join(stagingPath if stagingPath else os.getcwd(), livery.destination, p)
         if os.path.isdir(installRoot):
           installPath = os.path.join(installRoot, ".dcslm.json")
           try:
@@ -176,7 +421,175 @@ class LiveryManager:
           else:
             raise RuntimeError("Unable to find livery registry file \'" + registryPath + "\'.")
 
-  def download_livery_archive(self, livery, dlCallback=None, session=None, prependDCSUFID=True):
+  def _read_partial_download_info(self, partFilename, downloadURL):
+    infoFilename = partFilename + ".json"
+    if os.path.isfile(partFilename) and os.path.isfile(infoFilename):
+      try:
+        with open(infoFilename, "r") as infoFile:
+          partInfo = json.load(infoFile)
+          if partInfo.get('url') == downloadURL:
+            return partInfo
+      except (IOError, ValueError):
+        return None
+    return None
+
+  def _write_partial_download_info(self, partFilename, partInfo):
+    infoFilename = partFilename + ".json"
+    try:
+      with open(infoFilename, "w") as infoFile:
+        json.dump(partInfo, infoFile, indent=4)
+    except IOError:
+      raise RuntimeError("Unable to write partial download info to \'" + infoFilename + "\'")
+
+  def _remove_partial_download(self, partFilename):
+    for f in [partFilename, partFilename + ".json"]:
+      if os.path.isfile(f):
+        Utilities.remove_file(f)
+
+  def _get_partial_download_validator(self, partInfo):
+    if partInfo.get('etag') and not partInfo['etag'].startswith("W/"): # Weak ETags aren't allowed in If-Range
+      return partInfo['etag']
+    return partInfo.get('last_modified')
+
+  def _is_valid_range_response(self, req, partInfo, startByte):
+    if req.status_code != 206:
+      return False
+    contentRange = re.match(r"bytes (\d+)-(\d+)/(\d+)", req.headers.get('Content-Range', ""))
+    if not contentRange:
+      return False
+    if int(contentRange.group(1)) != startByte or int(contentRange.group(3)) != partInfo['size']:
+      return False
+    responseETag = req.headers.get('ETag')
+    if responseETag and partInfo.get('etag') and responseETag != partInfo['etag']:
+      return False
+    return True
+
+  def _is_retryable_download_error(self, e):
+    if isinstance(e, requests.exceptions.HTTPError): # 4xx responses won't change by asking again
+      return e.response is not None and e.response.status_code >= 500
+    return isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                          requests.exceptions.ChunkedEncodingError, ConnectionError))
+
+  def _download_archive_attempt(self, reqObj, downloadURL, partFilename, dlProgress):
+    partInfo = self._read_partial_download_info(partFilename, downloadURL)
+    resumeBytes = 0
+    reqHeaders = {}
+    if partInfo and partInfo.get('size'):
+      resumeBytes = os.path.getsize(partFilename)
+      validator = self._get_partial_download_validator(partInfo)
+      if resumeBytes and validator:
+        reqHeaders['Range'] = "bytes=" + str(resumeBytes) + "-"
+        reqHeaders['If-Range'] = validator
+      else:
+        resumeBytes = 0
+    archiveHash = Utilities.make_archive_hasher()
+    req = reqObj.get(downloadURL, stream=True, headers=reqHeaders, timeout=(10, 60))
+    try:
+      if resumeBytes:
+        if req.status_code == 416 and resumeBytes == partInfo['size']: # Partial file is already complete
+          dlProgress(resumeBytes)
+          return Utilities.update_hash_from_file(archiveHash, partFilename)
+        if req.status_code != 200 and not self._is_valid_range_response(req, partInfo, resumeBytes):
+          req.close() # Mismatched or rejected range, the body can't be appended to the partial file
+          resumeBytes = 0
+          req = reqObj.get(downloadURL, stream=True, timeout=(10, 60))
+      req.raise_for_status()
+      writeMode = 'ab'
+      if resumeBytes and req.status_code == 206:
+        Utilities.update_hash_from_file(archiveHash, partFilename) # Only the resumed part is read back from disk
+      else:
+        if req.status_code != 200:
+          raise requests.exceptions.HTTPError("Unexpected " + str(req.status_code) + " response for a full download",
+                                              response=req)
+        resumeBytes = 0
+        writeMode = 'wb'
+        partInfo = {
+          'url': downloadURL,
+          'size': int(req.headers.get('Content-Length', 0)),
+          'etag': req.headers.get('ETag'),
+          'last_modified': req.headers.get('Last-Modified')
+        }
+        self._write_partial_download_info(partFilename, partInfo)
+      writtenBytes = resumeBytes
+      dlProgress(writtenBytes)
+      with open(partFilename, writeMode) as f:
+        for chunk in req.iter_content(chunk_size=8192):
+          f.write(chunk)
+          archiveHash.update(chunk)
+          writtenBytes += len(chunk)
+          dlProgress(writtenBytes)
+    finally:
+      req.close()
+    if partInfo['size'] and os.path.getsize(partFilename) != partInfo['size']:
+      raise requests.exceptions.ConnectionError("Incomplete download (" + str(os.path.getsize(partFilename)) + "/" +
+                                                str(partInfo['size']) + " bytes)")
+    return archiveHash
+
+  def _get_archive_segment_count(self, partInfo, segments, minSegmentSize=4*(10**6)):
+    if not partInfo or not partInfo['ranges'] or not partInfo['size']:
+      return 1
+    return max(1, min(segments, partInfo['size'] // minSegmentSize))
+
+  def _download_archive_segment(self, reqObj, downloadURL, partFilename, partInfo, segment, dlCallback, stopEvent,
+                                retries, segmentState):
+    for attempt in range(0, retries + 1):
+      try:
+        if segment['position'] > segment['end'] or stopEvent.is_set():
+          return
+        reqHeaders = {'Range': "bytes=" + str(segment['position']) + "-" + str(segment['end'])}
+        with reqObj.get(downloadURL, stream=True, headers=reqHeaders, timeout=(10, 60)) as req:
+          req.raise_for_status()
+          if not self._is_valid_range_response(req, partInfo, segment['position']):
+            segmentState['fallback'] = True # Advertised ranges but ignored them (CDNs, redirects)
+            stopEvent.set()
+            return
+          with open(partFilename, 'r+b') as f: # Each segment writes through its own handle at its own offset
+            f.seek(segment['position'])
+            for chunk in req.iter_content(chunk_size=65536):
+              if stopEvent.is_set():
+                return
+              chunk = chunk[:segment['end'] + 1 - segment['position']]
+              f.write(chunk)
+              segment['position'] += len(chunk)
+              if dlCallback:
+                dlCallback['exec'](dlCallback, len(chunk))
+        if segment['position'] <= segment['end']:
+          raise requests.exceptions.ConnectionError("Incomplete download of bytes " + reqHeaders['Range'][6:])
+        return
+      except (IOError, ConnectionError) as e:
+        if attempt == retries or stopEvent.is_set() or not self._is_retryable_download_error(e):
+          raise
+        time.sleep(2 ** attempt)
+
+  def _download_archive_segmented(self, reqObj, downloadURL, partFilename, partInfo, segmentCount, dlCallback, retries):
+    self._remove_partial_download(partFilename)
+    with open(partFilename, 'wb') as f:
+      f.truncate(partInfo['size'])
+    segmentSize = -(-partInfo['size'] // segmentCount)
+    segmentList = []
+    for segmentStart in range(0, partInfo['size'], segmentSize):
+      segmentList.append({'position': segmentStart, 'end': min(segmentStart + segmentSize, partInfo['size']) - 1})
+    stopEvent = threading.Event()
+    segmentState = {'fallback': False}
+    segmentExecutor = ThreadPoolExecutor(max_workers=len(segmentList))
+    try:
+      segmentFutures = [segmentExecutor.submit(self._download_archive_segment, reqObj, downloadURL, partFilename,
+                                               partInfo, sL, dlCallback, stopEvent, retries, segmentState)
+                        for sL in segmentList]
+      for f in futures.as_completed(segmentFutures):
+        f.result()
+    except BaseException: # Preallocated files have holes so they can't be resumed from the end of the file
+      stopEvent.set()
+      segmentExecutor.shutdown(wait=True, cancel_futures=True)
+      self._remove_partial_download(partFilename)
+      raise
+    segmentExecutor.shutdown(wait=True)
+    if segmentState['fallback']:
+      self._remove_partial_download(partFilename)
+      return False
+    return True
+
+  def download_livery_archive(self, livery, dlCallback=None, session=None, prependDCSUFID=True, retries=5, segments=1):
     if livery:
       if livery.dcsuf.download:
         archiveType = str.split(livery.dcsuf.download, '.')[-1]
@@ -186,25 +599,61 @@ class LiveryManager:
           if prependDCSUFID:
             archiveFilename = str(livery.dcsuf.id) + "_" + archiveFilename
           destinationFilename = os.path.join(destinationPath, archiveFilename)
+          partFilename = destinationFilename + ".part"
+          reportedBytes = [0]
+
+          def report_progress(writtenBytes):
+            if dlCallback:
+              dlCallback['exec'](dlCallback, writtenBytes - reportedBytes[0])
+            reportedBytes[0] = writtenBytes
+
           try:
             if session:
               reqObj = session
             else:
               reqObj = requests
-            with reqObj.get(livery.dcsuf.download, stream=True) as req:
-              req.raise_for_status()
-              with open(destinationFilename, 'wb') as f:
-                if dlCallback:
-                  dlCallback['progress'].start_task(dlCallback['task'])
-                for chunk in req.iter_content(chunk_size=8192):
-                  f.write(chunk)
-                  if dlCallback:
-                    dlCallback['exec'](dlCallback, len(chunk))
+            if dlCallback:
+              dlCallback['progress'].start_task(dlCallback['task'])
+            segmentCount = 1
+            if segments > 1 and not self._read_partial_download_info(partFilename, livery.dcsuf.download):
+              try:
+                partInfo = Utilities.request_file_info(livery.dcsuf.download, session)
+              except (IOError, ConnectionError, ValueError):
+                partInfo = None
+              segmentCount = self._get_archive_segment_count(partInfo, segments)
+            if segmentCount > 1:
+              if self._download_archive_segmented(reqObj, livery.dcsuf.download, partFilename, partInfo,
+                                                  segmentCount, dlCallback, retries):
+                # Segments arrive out of order so the assembled file is hashed once at the end
+                archiveHash = Utilities.update_hash_from_file(Utilities.make_archive_hasher(), partFilename)
+                os.replace(partFilename, destinationFilename)
+                livery.archive_hash = Utilities.format_hash(archiveHash)
+                return destinationFilename
+              self.print("Server didn\'t honor range requests for \'" + archiveFilename +
+                         "\', downloading it as a single stream.", style="bold gold1")
+              if dlCallback:
+                dlCallback['progress'].update(dlCallback['task'], completed=0)
+            for attempt in range(0, retries + 1):
+              try:
+                archiveHash = self._download_archive_attempt(reqObj, livery.dcsuf.download, partFilename,
+                                                             report_progress)
+                break
+              except (IOError, ConnectionError) as e:
+                if attempt == retries or not self._is_retryable_download_error(e):
+                  raise
+                retryDelay = 2 ** attempt
+                self.print("Download of \'" + archiveFilename + "\' interrupted (" + str(e) + "). Resuming in " +
+                           str(retryDelay) + " seconds...", style="bold gold1")
+                time.sleep(retryDelay)
+            os.replace(partFilename, destinationFilename)
+            self._remove_partial_download(partFilename)
+            livery.archive_hash = Utilities.format_hash(archiveHash)
             return destinationFilename
           except (KeyboardInterrupt, IOError, ConnectionError, FileNotFoundError) as e:
-            if os.path.isfile(destinationFilename):
-              Utilities.remove_file(destinationFilename)
-            raise RuntimeError("Failed during download of archive " + livery.dcsuf.download + ": " + str(e))
+            failedMsg = "Failed during download of archive " + livery.dcsuf.download + ": " + str(e)
+            if os.path.isfile(partFilename):
+              failedMsg += " (partial download kept to resume later)"
+            raise RuntimeError(failedMsg)
     raise RuntimeError("Unable to get downloaded archive path for livery \'" + livery.dcsuf.title + "\'.")
 
   def get_num_registered_liveries(self):
@@ -276,34 +725,184 @@ class LiveryManager:
     if os.path.isdir(extractedRoot) and Utilities.validate_remove_path(extractedRoot):
       shutil.rmtree(extractedRoot, onerror=Utilities.remove_readonly)
 
+  def _get_livery_extract_path(self, livery):
+    extractRoot = os.path.join(os.getcwd(), self.FolderRoot, "extract", str(livery.dcsuf.id))
+    archiveFolder = os.path.splitext(livery.archive)[0].split('\\')[-1]
+    extractedPath = os.path.join(extractRoot, archiveFolder)
+    extractedPath = (extractedPath + "\\").replace("\\", "/") # WinRAR doesn't like single backslashes
+    return extractedPath
+
   def extract_livery_archive(self, livery, verbose=False):
     if livery:
       if len(livery.archive):
         if os.path.isfile(livery.archive):
-          extractRoot = os.path.join(os.getcwd(), self.FolderRoot, "extract", str(livery.dcsuf.id))
-          archiveFolder = os.path.splitext(livery.archive)[0].split('\\')[-1]
-          extractedPath = os.path.join(extractRoot, archiveFolder)
-          extractedPath = (extractedPath + "\\").replace("\\", "/") # WinRAR doesn't like single backslashes
+          extractedPath = self._get_livery_extract_path(livery)
           if not os.path.isdir(extractedPath):
             os.makedirs(extractedPath, exist_ok=True)
           self._remove_existing_extracted_files(livery, extractedPath)
-          self.extract_archive(livery, livery.archive, extractedPath, verbose=verbose, prefer7z=True)
-          self._extract_extracted_archive(livery, extractedPath)
+          selective = bool(self.get_config_value("selective_extract"))
+          self.extract_archive(livery, livery.archive, extractedPath, verbose=verbose, prefer7z=True,
+                               selective=selective)
+          self._extract_extracted_archive(livery, extractedPath, selective=selective)
           return extractedPath
     return None
 
-  def extract_archive(self, livery, archivePath, extractPath, verbose=False, prefer7z=True):
+  def _get_archive_member_path(self, memberName):
+    memberParts = [p for p in re.split(r"[\\/]", memberName) if p not in ["", ".", ".."]]
+    if not len(memberParts):
+      return None
+    return os.path.join(*memberParts)
+
+  def _is_readable_zip_member(self, zipInfo):
+    if zipInfo.flag_bits & 0x1: # Encrypted
+      return False
+    return zipInfo.compress_type in ZipReadableCompressTypes
+
+  def list_livery_archive(self, livery):
+    if not livery or not livery.archive or not os.path.isfile(livery.archive) or not zipfile.is_zipfile(livery.archive):
+      return None
+    with zipfile.ZipFile(livery.archive, "r") as zipArchive:
+      zipMembers = {m.filename: m for m in zipArchive.infolist() if not m.is_dir()}
+    for m in zipMembers.values():
+      if not self._is_readable_zip_member(m): # Deflate64, PPMd or passwords need the extract path
+        return None
+    memberNames = list(zipMembers.keys())
+    if self.get_config_value("selective_extract"):
+      memberNames = self._select_livery_archive_members(memberNames)
+    archiveMembers = {}
+    for m in memberNames:
+      if self._is_archive_file(m): # Nested archives have to be extracted to find their liveries
+        return None
+      memberPath = self._get_archive_member_path(m)
+      if memberPath:
+        archiveMembers[memberPath] = {'member': m, 'size': zipMembers[m].file_size}
+    return archiveMembers
+
+  def extract_livery_archive_descriptions(self, livery, archiveMembers, verbose=False):
+    if livery and archiveMembers is not None:
+      extractedPath = self._get_livery_extract_path(livery)
+      self._remove_existing_extracted_files(livery, extractedPath)
+      os.makedirs(extractedPath, exist_ok=True)
+      with zipfile.ZipFile(livery.archive, "r") as zipArchive:
+        for memberPath, memberData in archiveMembers.items():
+          if self.is_valid_livery_directory([os.path.split(memberPath)[1]]):
+            descPath = os.path.join(extractedPath, memberPath)
+            os.makedirs(os.path.split(descPath)[0], exist_ok=True)
+            with zipArchive.open(memberData['member'], "r") as memberFile, open(descPath, "wb") as descFile:
+              shutil.copyfileobj(memberFile, descFile)
+            if verbose:
+              self.print("Extracted \'" + memberData['member'] + "\' from \'" + livery.archive + "\'")
+      return extractedPath
+    return None
+
+  def _is_archive_file(self, filePath):
+    return os.path.splitext(filePath)[-1][1:] in patoolib.ArchiveFormats
+
+  def _select_livery_archive_members(self, memberNames):
+    directoryMembers = {}
+    for m in memberNames:
+      memberDir, memberFile = os.path.split(m.replace("\\", "/"))
+      if memberDir not in directoryMembers:
+        directoryMembers[memberDir] = {'files': [], 'members': []}
+      directoryMembers[memberDir]['files'].append(memberFile)
+      directoryMembers[memberDir]['members'].append(m)
+    selectedMembers = []
+    for d in directoryMembers.values():
+      if self.is_valid_livery_directory(d['files']) or self.is_valid_data_directory(d['files']):
+        selectedMembers.extend(d['members'])
+      else: # Inner archives can still contain liveries
+        selectedMembers.extend([m for m in d['members'] if self._is_archive_file(m)])
+    if not len(selectedMembers): # Nothing recognizable, let detection report on the full archive
+      return memberNames
+    return selectedMembers
+
+  def _extract_archive_in_process(self, archivePath, extractPath, verbose=False, selective=False):
+    if zipfile.is_zipfile(archivePath):
+      with zipfile.ZipFile(archivePath, "r") as zipArchive:
+        memberInfos = [m for m in zipArchive.infolist() if not m.is_dir()]
+        if not all([self._is_readable_zip_member(m) for m in memberInfos]):
+          return False
+        memberNames = [m.filename for m in memberInfos]
+        extractMembers = self._select_livery_archive_members(memberNames) if selective else memberNames
+        if verbose:
+          self.print("Extracting " + str(len(extractMembers)) + " of " + str(len(memberNames)) + " files from \'" +
+                     archivePath + "\' with zipfile")
+        zipArchive.extractall(extractPath, members=extractMembers)
+      return True
+    if py7zr and py7zr.is_7zfile(archivePath):
+      with py7zr.SevenZipFile(archivePath, mode="r") as szArchive:
+        memberNames = [m.filename for m in szArchive.list() if not m.is_directory]
+        extractMembers = self._select_livery_archive_members(memberNames) if selective else memberNames
+        if verbose:
+          self.print("Extracting " + str(len(extractMembers)) + " of " + str(len(memberNames)) + " files from \'" +
+                     archivePath + "\' with py7zr")
+        szArchive.extract(path=extractPath, targets=extractMembers)
+      return True
+    return False
+
+  def extract_archive(self, livery, archivePath, extractPath, verbose=False, prefer7z=True, selective=False):
+    try:
+      if self._extract_archive_in_process(archivePath, extractPath, verbose=verbose, selective=selective):
+        return
+    except InProcessArchiveErrors as e: # Unsupported compression method or damaged archive, let patool try it
+      if verbose:
+        self.print("Falling back to patool for \'" + archivePath + "\': " + str(e))
     prefProgram = None
     if patoolib.util.get_nt_7z_dir() != "" and prefer7z:
       prefProgram = "7z"
     patoolVerbosity = (2 if verbose else 0)
     patoolib.extract_archive(archivePath, patoolVerbosity, extractPath, program=prefProgram)
 
-  def _extract_extracted_archive(self, livery, extractedPath):
-    extractedFiles = glob.glob(extractedPath + "/**/*", recursive=True)
-    for f in extractedFiles:
-      if os.path.splitext(f)[-1][1:] in patoolib.ArchiveFormats:
-        self.extract_archive(livery, f, extractedPath)
+  def _find_nested_archives(self, extractedPath):
+    nestedArchives = []
+    for root, dirs, files in os.walk(extractedPath):
+      dirs.sort()
+      for f in sorted(files):
+        if self._is_archive_file(f):
+          nestedArchives.append(os.path.join(root, f))
+    return nestedArchives
+
+  def _extract_nested_archive(self, livery, archivePath, isolatedPath, selective=False):
+    os.makedirs(isolatedPath, exist_ok=True)
+    isolatedPath = (isolatedPath + "\\").replace("\\", "/") # WinRAR doesn't like single backslashes
+    self.extract_archive(livery, archivePath, isolatedPath, selective=selective)
+    return isolatedPath
+
+  def _merge_nested_archive(self, isolatedPath, extractedPath):
+    mergedArchives = []
+    for root, dirs, files in os.walk(isolatedPath):
+      dirs.sort()
+      relativeRoot = os.path.relpath(root, isolatedPath)
+      destinationRoot = os.path.normpath(os.path.join(extractedPath, relativeRoot))
+      os.makedirs(destinationRoot, exist_ok=True)
+      for f in sorted(files):
+        destinationFile = os.path.join(destinationRoot, f)
+        os.replace(os.path.join(root, f), destinationFile)
+        if self._is_archive_file(f):
+          mergedArchives.append(destinationFile)
+    shutil.rmtree(isolatedPath, onerror=Utilities.remove_readonly)
+    return mergedArchives
+
+  def _extract_extracted_archive(self, livery, extractedPath, selective=False, maxDepth=3):
+    nestedArchives = self._find_nested_archives(extractedPath)
+    if not len(nestedArchives):
+      return
+    # Inner archives are extracted side by side into their own folders, then merged into the extracted archive
+    nestedRoot = os.path.join(os.path.split(os.path.normpath(extractedPath))[0], ".nested")
+    depth = 1
+    with ThreadPoolExecutor(max_workers=min(len(nestedArchives), os.cpu_count() or 1)) as nestedExecutor:
+      while len(nestedArchives) and depth <= maxDepth:
+        nestedFutures = []
+        for i in range(0, len(nestedArchives)):
+          isolatedPath = os.path.join(nestedRoot, str(depth) + "_" + str(i))
+          nestedFutures.append(nestedExecutor.submit(self._extract_nested_archive, livery, nestedArchives[i],
+                                                     isolatedPath, selective))
+        nestedArchives = []
+        for f in nestedFutures:
+          nestedArchives.extend(self._merge_nested_archive(f.result(), extractedPath))
+        depth += 1
+    if os.path.isdir(nestedRoot):
+      shutil.rmtree(nestedRoot, onerror=Utilities.remove_readonly)
 
   def is_valid_livery_directory(self, fileList):
     for f in fileList:
@@ -319,7 +918,7 @@ class LiveryManager:
           return True
     return False
 
-  def detect_extracted_liveries(self, livery, extractPath, extractedLiveryFiles):
+  def detect_extracted_liveries(self, livery, extractPath, extractedLiveryFiles, archiveMembers=None):
     liveryDirectories = []
     for root, files in extractedLiveryFiles.items():
       liveryName = root
@@ -332,7 +931,7 @@ class LiveryManager:
           liveryName = str.split(root,"\\")[-1]
       if len(liveryName):
         folderData['name'] = liveryName
-        folderData['size'] = self._get_size_of_extracted_livery_files(livery, extractPath, files)
+        folderData['size'] = self._get_size_of_extracted_livery_files(livery, extractPath, files, archiveMembers)
         if not self.is_valid_livery_directory(files):
           if self.is_valid_data_directory(files):
             folderData['data'] = True
@@ -342,24 +941,79 @@ class LiveryManager:
         liveryDirectories.append(folderData)
     return liveryDirectories
 
-  def does_archive_exist(self, archiveName):
-    archiveFiles = glob.glob(os.path.join(os.getcwd(), self.FolderRoot, "archives") + "/*.*")
-    for a in archiveFiles:
-      if archiveName in a:
-        return a
-    return None
-
-  def compare_archive_sizes(self, archivePath, archiveURL):
+  def calculate_global_unique_sizes(self, liveries):
+    seenFiles = set() # Shared across liveries so files linked between them are only counted once
+    for livery in liveries:
+      for t, l in livery.installs['liveries'].items():
+        l['global_unique_size'] = 0
+        for p in l['paths']:
+          installPath = os.path.join(os.getcwd(), livery.destination, p)
+          l['global_unique_size'] += Utilities.get_unique_size_of_directory(installPath, seenFiles)
+      self.register_livery(livery)
+
+  def clear_global_unique_sizes(self):
+    for livery in self.Liveries.values():
+      for t, l in livery.installs['liveries'].items():
+        l.pop('global_unique_size', None)
+
+  def get_archive_cache_max_size(self):
+    try:
+      return max(0, int(self.get_config_value("archive_cache_mb"))) * (10**6)
+    except (TypeError, ValueError):
+      return int(self.make_default_data()['config']['archive_cache_mb']) * (10**6)
+
+  def load_archive_cache(self):
+    if os.path.isdir(self.ArchiveCache.get_archives_path()):
+      hasIndex = self.ArchiveCache.has_index()
+      self.ArchiveCache.load_index()
+      if not hasIndex:
+        self.ArchiveCache.import_legacy_archives()
+        archivesCount, archivesSize = self.ArchiveCache.get_stats()
+        maxSize = self.get_archive_cache_max_size()
+        if maxSize and archivesSize > maxSize:
+          self.print("Saved archives in \'DCSLM\\archives\' use " + str(round(archivesSize / (10**6))) +
+                     " MB, over the archive cache limit of " + str(round(maxSize / (10**6))) + " MB. The least " +
+                     "recently used archives will be removed the next time an archive is kept.", style="warn")
+    return self.ArchiveCache.Index
+
+  def get_cached_archive(self, livery, pin=False):
+    return self.ArchiveCache.lookup(dcsufID=livery.dcsuf.id, url=livery.dcsuf.download, pin=pin)
+
+  def store_cached_archive(self, livery, archivePath, pin=False):
+    if not livery.archive_hash:
+      livery.archive_hash = Utilities.format_hash(Utilities.update_hash_from_file(Utilities.make_archive_hasher(),
+                                                                                  archivePath))
+    return self.ArchiveCache.store(archivePath, livery.archive_hash, dcsufID=livery.dcsuf.id,
+                                   url=livery.dcsuf.download, maxSize=self.get_archive_cache_max_size(), pin=pin)
+
+  def unpin_cached_archive(self, archiveHash):
+    self.ArchiveCache.unpin(archiveHash)
+
+  def flush_archive_cache(self):
+    with self.ArchiveCache.lock:
+      self.ArchiveCache.evict(self.get_archive_cache_max_size()) # Catch up on blobs that were pinned during installs
+      self.ArchiveCache.flush_index()
+
+  def is_cached_archive(self, archivePath):
+    return self.ArchiveCache.is_cached_archive(archivePath)
+
+  def get_archive_cache_stats(self):
+    return self.ArchiveCache.get_stats()
+
+  def compare_archive_sizes(self, archivePath, archiveURL, session=None):
     if os.path.isfile(archivePath):
       fileSize = os.path.getsize(archivePath)
-      urlSize = self.request_archive_size(archiveURL)
+      urlSize = self.request_archive_size(archiveURL, session)
       return fileSize == urlSize
     return False
 
-  def get_extracted_livery_files(self, livery, extractPath):
-    extractedFiles = glob.glob(extractPath + "/**/*", recursive=True)
-    for i in range(0, len(extractedFiles)): # Remove extract root from glob filenames
-      extractedFiles[i] = extractedFiles[i][len(extractPath):]
+  def get_extracted_livery_files(self, livery, extractPath, archiveMembers=None):
+    if archiveMembers is not None: # Files are still in the archive, use its listing
+      extractedFiles = list(archiveMembers.keys())
+    else:
+      extractedFiles = glob.glob(extractPath + "/**/*", recursive=True)
+      for i in range(0, len(extractedFiles)): # Remove extract root from glob filenames
+        extractedFiles[i] = extractedFiles[i][len(extractPath):]
     if livery:
       directoryFiles = {}
       for f in extractedFiles:
@@ -370,21 +1024,22 @@ class LiveryManager:
       return directoryFiles
     return None
 
-  def _get_size_of_extracted_livery_files(self, livery, extractPath, fileList):
+  def _get_size_of_extracted_livery_files(self, livery, extractPath, fileList, archiveMembers=None):
     totalSize = 0
     for f in fileList:
       filePath = f
       if f[0] == "\\" or f[0] == "/":
         filePath = f[1:]
-      extractedFilepath = os.path.join(extractPath, filePath)
-      totalSize += os.path.getsize(extractedFilepath)
+      if archiveMembers is not None:
+        totalSize += archiveMembers[filePath]['size']
+      else:
+        extractedFilepath = os.path.join(extractPath, filePath)
+        totalSize += os.path.getsize(extractedFilepath)
     return totalSize
 
-  def _copy_livery_files(self, livery, extractPath, fileList, installLivery):
+  def _get_livery_files_to_copy(self, fileList):
     badFiles = ['desktop.ini', 'thumbs.db']
-    installDirectory = os.path.join(os.getcwd(), installLivery)
-    if not os.path.isdir(installDirectory):
-      os.makedirs(installDirectory, exist_ok=True)
+    copyFiles = []
     for f in fileList:
       splitPath = os.path.split(f)
       fileName = splitPath[1]
@@ -400,28 +1055,163 @@ class LiveryManager:
       filePath = f
       if f[0] == "\\" or f[0] == "/":
         filePath = f[1:]
+      copyFiles.append((filePath, fileName))
+    return copyFiles
+
+  def _is_same_device(self, firstPath, secondPath):
+    try:
+      return os.stat(firstPath).st_dev == os.stat(secondPath).st_dev
+    except OSError:
+      return False
+
+  def _make_copy_engine(self, copyCallback=None):
+    copyEngine = {
+      'executor': ThreadPoolExecutor(max_workers=self.get_config_workers("copy_workers")),
+      'callback': copyCallback,
+      'lock': threading.Lock(),
+      'bytes': 0,
+      'start': time.time()
+    }
+    return copyEngine
+
+  def _run_livery_copy_job(self, copyEngine, copyFunc, *copyArgs):
+    copiedBytes = copyFunc(*copyArgs)
+    if copyEngine:
+      with copyEngine['lock']:
+        copyEngine['bytes'] += copiedBytes
+        if copyEngine['callback']:
+          copyEngine['callback']['exec'](copyEngine['callback'], copyEngine['bytes'], time.time() - copyEngine['start'])
+    return copiedBytes
+
+  def _run_livery_copy_jobs(self, copyEngine, copyJobs):
+    if not copyEngine:
+      for j in copyJobs:
+        self._run_livery_copy_job(None, *j)
+      return
+    copyFutures = [copyEngine['executor'].submit(self._run_livery_copy_job, copyEngine, *j) for j in copyJobs]
+    futures.wait(copyFutures)
+    for f in copyFutures:
+      f.result()
+
+  def _copy_livery_files(self, livery, extractPath, fileList, installLivery, moveFiles=False, copyEngine=None):
+    installDirectory = os.path.join(os.getcwd(), installLivery)
+    if not os.path.isdir(installDirectory):
+      os.makedirs(installDirectory, exist_ok=True)
+    moveFiles = moveFiles and self._is_same_device(extractPath, installDirectory)
+    copyJobs = []
+    for filePath, fileName in self._get_livery_files_to_copy(fileList):
       extractedFilepath = os.path.join(extractPath, filePath)
       destinationFilepath = os.path.join(installDirectory, fileName)
-      shutil.copy2(extractedFilepath, destinationFilepath)
+      if moveFiles:
+        try:
+          os.replace(extractedFilepath, destinationFilepath)
+          continue
+        except OSError: # Fall back to copying if the rename is refused
+          pass
+      copyJobs.append((Utilities.copy_file, extractedFilepath, destinationFilepath))
+    self._run_livery_copy_jobs(copyEngine, copyJobs)
+    return True
+
+  def _extract_archive_member(self, zipArchive, memberName, destinationFilepath):
+    with zipArchive.open(memberName, "r") as memberFile, open(destinationFilepath, "wb") as destinationFile:
+      shutil.copyfileobj(memberFile, destinationFile, 1024*1024)
+      return destinationFile.tell()
+
+  def _install_livery_files_from_archive(self, livery, zipArchive, archiveMembers, fileList, installLivery,
+                                         copyEngine=None):
+    installDirectory = os.path.join(os.getcwd(), installLivery)
+    if not os.path.isdir(installDirectory):
+      os.makedirs(installDirectory, exist_ok=True)
+    copyJobs = []
+    for filePath, fileName in self._get_livery_files_to_copy(fileList):
+      destinationFilepath = os.path.join(installDirectory, fileName)
+      copyJobs.append((self._extract_archive_member, zipArchive, archiveMembers[filePath]['member'],
+                       destinationFilepath))
+    self._run_livery_copy_jobs(copyEngine, copyJobs)
+    return True
+
+  def _get_install_livery_root(self, livery, installPath, extractedLiveryFiles):
+    installLivery = str.split(installPath, "\\")[-1]
+    for root, files in extractedLiveryFiles.items():
+      rootUnit = livery.dcsuf.title
+      if root != "\\":
+        if not len(root):
+          rootUnit = livery.dcsuf.title
+        else:
+          rootUnit = str.split(root, "\\")[-1]
+      if installLivery == rootUnit:
+        if self.is_valid_livery_directory(files) or self.is_valid_data_directory(files):
+          return root
+    return None
+
+  def _link_livery_files(self, livery, sourceLivery, fileList, installLivery):
+    installDirectory = os.path.join(os.getcwd(), installLivery)
+    if not os.path.isdir(installDirectory):
+      os.makedirs(installDirectory, exist_ok=True)
+    for filePath, fileName in self._get_livery_files_to_copy(fileList):
+      sourceFilepath = os.path.join(sourceLivery, fileName)
+      destinationFilepath = os.path.join(installDirectory, fileName)
+      if self.is_valid_livery_directory([fileName]): # Optimizing rewrites description.lua per unit
+        shutil.copy2(sourceFilepath, destinationFilepath)
+      else:
+        Utilities.link_file(sourceFilepath, destinationFilepath)
     return True
 
-  def copy_detected_liveries(self, livery, extractPath, extractedLiveryFiles, installPaths):
+  def copy_detected_liveries(self, livery, extractPath, extractedLiveryFiles, installPaths, archiveMembers=None,
+                             copyCallback=None, stagingPath=None):
+    try:
+      return self._copy_detected_liveries(livery, extractPath, extractedLiveryFiles, installPaths, archiveMembers,
+                                          copyCallback, stagingPath)
+    except ZipMemberReadErrors as e:
+      if archiveMembers is None:
+        raise
+      self.print("Unable to install \'" + livery.archive + "\' directly from the archive (" + str(e) +
+                 "), extracting it instead.", style="warn")
+    extractPath = self.extract_livery_archive(livery)
+    if not extractPath:
+      raise RuntimeError("Failed to extract livery archive \'" + str(livery.archive) + "\'.")
+    extractedLiveryFiles = self.get_extracted_livery_files(livery, extractPath)
+    return self._copy_detected_liveries(livery, extractPath, extractedLiveryFiles, installPaths, None, copyCallback,
+                                        stagingPath)
+
+  def _copy_detected_liveries(self, livery, extractPath, extractedLiveryFiles, installPaths, archiveMembers=None,
+                              copyCallback=None, stagingPath=None):
     copiedLiveries = []
+    installRoots = []
+    rootInstalls = {}
     for install in installPaths:
-      installPath = os.path.join(os.getcwd(), livery.destination, install)
-      installLivery = str.split(installPath, "\\")[-1]
-      for root, files in extractedLiveryFiles.items():
-        rootUnit = livery.dcsuf.title
-        if root != "\\":
-          if not len(root):
-            rootUnit = livery.dcsuf.title
-          else:
-            rootUnit = str.split(root, "\\")[-1]
-        if installLivery == rootUnit:
-          if self.is_valid_livery_directory(files) or self.is_valid_data_directory(files):
-            if self._copy_livery_files(livery, extractPath, files, installPath):
-              copiedLiveries.append(install)
-              break
+      installPath = os.path.join(stagingPath if stagingPath else os.getcwd(), livery.destination, install)
+      root = self._get_install_livery_root(livery, installPath, extractedLiveryFiles)
+      installRoots.append((install, installPath, root))
+      if root is not None:
+        rootInstalls[root] = rootInstalls.get(root, 0) + 1
+    linkInstalls = bool(self.get_config_value("link_installs"))
+    rootSources = {}
+    zipArchive = zipfile.ZipFile(livery.archive, "r") if archiveMembers is not None else None
+    copyEngine = self._make_copy_engine(copyCallback)
+    try:
+      for install, installPath, root in installRoots:
+        if root is None:
+          continue
+        files = extractedLiveryFiles[root]
+        rootInstalls[root] -= 1
+        if linkInstalls and root in rootSources: # Files were already written once for another unit
+          copiedFiles = self._link_livery_files(livery, rootSources[root], files, installPath)
+        elif zipArchive:
+          copiedFiles = self._install_livery_files_from_archive(livery, zipArchive, archiveMembers, files, installPath,
+                                                                copyEngine)
+        else: # Extracted files can be moved into the last unit they're installed to
+          copiedFiles = self._copy_livery_files(livery, extractPath, files, installPath,
+                                                moveFiles=(linkInstalls or rootInstalls[root] == 0),
+                                                copyEngine=copyEngine)
+        if copiedFiles:
+          copiedLiveries.append(install)
+          if root not in rootSources:
+            rootSources[root] = installPath
+    finally:
+      copyEngine['executor'].shutdown(wait=True)
+      if zipArchive:
+        zipArchive.close()
     return copiedLiveries
 
   def remove_extracted_livery_archive(self, livery, extractedID=None):
@@ -500,26 +1290,19 @@ class LiveryManager:
       return l
     raise RuntimeError("Unable to get livery data from path \'" + path + "\'")
 
-  def request_archive_size(self, archiveURL):
+  def request_archive_size(self, archiveURL, session=None):
     if len(archiveURL):
-      return Utilities.request_file_size(archiveURL)
+      return Utilities.request_file_size(archiveURL, session)
     return 0
 
   def _count_unit_parts(self, descParts):
     unitPartsCount = {}
     for p in descParts:
-      for c in UM.Categories:
-        if c in UM.Units.keys():
-          for u, d in UM.Units[c].items():
-            unitCount = 0
-            for uP in d.parts:
-              if uP == p:
-                unitCount += 1
-            if unitCount > 0:
-              if not d in unitPartsCount:
-                unitPartsCount[d] = unitCount
-              else:
-                unitPartsCount[d] += unitCount
+      for d, unitCount in UM.get_units_from_part(p).items():
+        if not d in unitPartsCount:
+          unitPartsCount[d] = unitCount
+        else:
+          unitPartsCount[d] += unitCount
     return unitPartsCount
 
   def determine_unit_from_description_path(self, descPath, dlPath):
@@ -529,8 +1312,7 @@ class LiveryManager:
       dlPathUnit = UM.get_unit_from_liveries_dir(splitDLPath[-2])
     if dlPathUnit:
       return dlPathUnit
-    descLines = self._optimize_get_desclines_from_description_file(descPath)
-    descParts = self._get_parts_from_description(descLines)
+    descParts = self._get_parts_from_description(self._get_description_records(descPath))
     unitPartsCount = self._count_unit_parts(descParts)
     if len(unitPartsCount.keys()) > 0:
       return max(unitPartsCount, key=unitPartsCount.get)
@@ -543,35 +1325,29 @@ class LiveryManager:
         return readFile.readlines()
     return []
 
-  def _optimize_get_lua_statements_from_line(self, line, commentStart=None, commentEnd=None):
-    if not commentStart:
-      commentStart = len(line) + 1
-    if not commentEnd:
-      commentEnd = -1
-    luaStatements = []
-    reStatement = re.findall("(.+[;\n])", line)
-    if len(reStatement):
-      for rs in reStatement:
-        luaStatement = str.strip(rs)
-        splitStatements = str.split(luaStatement, ';')
-        for s in splitStatements:
-          s = s[str.find(s, '{'):str.find(s, '}') + 1]
-          subStrStart = str.find(line, s)
-          if not (subStrStart > commentStart and subStrStart < commentEnd - 2) and len(s):
-            luaStatements.append(s)
-    return luaStatements
-
-  def _optimize_get_py_statements_from_line(self, line, commentStart=None, commentEnd=None):
-    luaStatements = self._optimize_get_lua_statements_from_line(line, commentStart, commentEnd)
-    pyStatements = []
-    for ls in luaStatements:
-      ps = self._optimize_lua_statement_to_py(ls)
-      if len(ps) == 4:
-        pyStatements.append(ps)
-    return pyStatements
+  def _optimize_replace_lua_statements(self, descText, pyStatements, commentLine=False):
+    correctedText = []
+    textPosition = 0
+    commentedPosition = 0
+    for ps in sorted(pyStatements, key=lambda ps: ps[4]): # Spans are offsets into the original text
+      if commentLine and ps[4] >= commentedPosition: # Keep the original lines commented out above the corrected ones
+        lineStart = str.rfind(descText, "\n", 0, ps[4]) + 1
+        lineEnd = str.find(descText, "\n", ps[5])
+        lineEnd = len(descText) if lineEnd == -1 else lineEnd + 1
+        correctedText.append(descText[textPosition:lineStart])
+        correctedText.extend(["--" + l for l in descText[lineStart:lineEnd].splitlines(keepends=True)])
+        if not descText[lineStart:lineEnd].endswith("\n"):
+          correctedText.append("\n")
+        textPosition = lineStart
+        commentedPosition = lineEnd
+      correctedText.append(descText[textPosition:ps[4]])
+      correctedText.append(self._optimize_py_statement_to_lua(ps))
+      textPosition = ps[5]
+    correctedText.append(descText[textPosition:])
+    return ''.join(correctedText)
 
   def _optimize_py_statement_to_lua(self, pyStatement, rootLivery = "", rootLiveryPath = "") -> str:
-    if len(pyStatement) == 4:
+    if len(pyStatement) >= 4:
       if pyStatement[2].startswith("../"):
         splitExistingPath = str.split(pyStatement[2], '/')
         detectedRootLivery = splitExistingPath[-2] + "/"
@@ -588,54 +1364,19 @@ class LiveryManager:
       return luaStatement
     return ""
 
-  def _optimize_lua_statement_to_py(self, luaStatement):
-    luaData = []
-    splitStatement = str.split(luaStatement[1:-1], ',')
-    if len(splitStatement) == 4:
-      try:
-        splitStatement[0] = re.search("\".+\"", str.strip(splitStatement[0])).group()[1:-1]
-        splitStatement[1] = str.strip(str.strip(splitStatement[1]))
-        splitStatement[2] = re.search("\".+\"", str.strip(splitStatement[2])).group()[1:-1]
-        if splitStatement[2].startswith('..'):
-          splitStatement[2] = os.path.normpath(splitStatement[2]).replace('\\', '/')
-        splitStatement[3] = False if (str.lower(str.strip(splitStatement[3])) == "false") else True
-        luaData = splitStatement
-      except Exception as e:
-        self.print("Unable to parse lua statement - " + str(e) + ": " + luaStatement, style="warn")
-        return []
-    return luaData
-
-  def _get_py_statements_from_description(self, descLines):
-    inCommentBlock = False
-    pyStatements = []
-    for line in descLines:
-      commentStart = str.find(line, "--")
-      blockStart = str.find(line, "--[[")
-      if blockStart != -1:
-        blockStart -= 2
-        inCommentBlock = True
-      blockEnd = str.find(line, "]]")
-      if blockEnd > -1:
-        commentStart = str.find(line, "--", blockEnd - 2)
-        inCommentBlock = False
-      if commentStart < 0:
-        commentStart = len(line) + 1
-      if not inCommentBlock:
-        pyStatements.extend(self._optimize_get_py_statements_from_line(line, commentStart, blockEnd))
-    return pyStatements
-
-  def _get_parts_from_description(self, descLines):
+  def _get_description_records(self, descPath):
+    return Utilities.read_description_records(descPath)
+
+  def _get_parts_from_description(self, pyStatements):
     parts = []
-    pyStatements = self._get_py_statements_from_description(descLines)
     for ps in pyStatements:
       lowerPart = str.lower(ps[0])
       if not lowerPart in parts:
         parts.append(lowerPart)
     return parts
 
-  def _get_file_refs_from_description(self, descLines):
+  def _get_file_refs_from_description(self, pyStatements):
     fileRefs = {}
-    pyStatements = self._get_py_statements_from_description(descLines)
     for ps in pyStatements:
       if not ps[3]:
         partStr = ps[0] + ':' + ps[1]
@@ -657,8 +1398,22 @@ class LiveryManager:
         dataFiles[fileName] = {'parts': []}
     return dataFiles
 
-  def _optimize_generate_file_hashes(self, installRoot, liveryTitle, fileRefs):
-    fileHashes = {}
+  def get_file_hash_cache_path(self):
+    return os.path.join(os.getcwd(), self.FolderRoot, "file_hashes.json")
+
+  def load_file_hash_cache(self):
+    Utilities.set_file_hash_algorithm(self.get_config_value("hash_algorithm"))
+    try:
+      return Utilities.load_file_hash_cache(self.get_file_hash_cache_path())
+    except RuntimeError as e: # Only a cache, rehash everything and overwrite it on the next write
+      self.print(str(e) + ", starting with an empty file hash cache.", style="warn")
+      return 0
+
+  def write_file_hash_cache(self):
+    return Utilities.write_file_hash_cache(self.get_file_hash_cache_path())
+
+  def _optimize_get_fileref_paths(self, installRoot, fileRefs):
+    refPaths = []
     for f, d in fileRefs.items():
       filepath = os.path.abspath(os.path.join(installRoot, f))
       splitFile = str.split(filepath, '\\')
@@ -666,16 +1421,54 @@ class LiveryManager:
         detectedFormat = Utilities.find_desc_file_format(filepath)
         filepath += "." + detectedFormat
       if os.path.isfile(filepath):
-        fileHash = Utilities.hash_file(filepath)
-        if fileHash:
-          d['hash'] = fileHash
-          if not fileHash in fileHashes.keys():
-            fileHashes[fileHash] = [liveryTitle]
-          else:
-            if liveryTitle not in fileHashes[fileHash]:
-              fileHashes[fileHash].append(liveryTitle)
+        refPaths.append((d, filepath))
       else:
         self.print("Unable to hash missing file " + filepath, style="bold red")
+    return refPaths
+
+  def _optimize_group_files(self, fileGroups, groupKey, filepath):
+    if groupKey not in fileGroups.keys():
+      fileGroups[groupKey] = []
+    fileGroups[groupKey].append(filepath)
+
+  def _optimize_hash_candidate_files(self, hashExecutor, filePaths, partialBlockSize=64*1024):
+    fileKeys = {}
+    sizeGroups = {}
+    for fp in filePaths: # Files can only have the same content if they have the same size
+      self._optimize_group_files(sizeGroups, os.path.getsize(fp), fp)
+    partialJobs = []
+    fullJobs = []
+    for size, group in sizeGroups.items():
+      if len(group) == 1:
+        fileKeys[group[0]] = "unique:" + group[0]
+      elif size <= 2 * partialBlockSize:
+        fullJobs.extend([(fp, hashExecutor.submit(Utilities.hash_file, fp)) for fp in group])
+      else:
+        partialJobs.extend([(fp, size, hashExecutor.submit(Utilities.hash_file_partial, fp, partialBlockSize))
+                            for fp in group])
+    partialGroups = {}
+    for fp, size, partialFuture in partialJobs: # Compare first and last blocks before reading whole files
+      self._optimize_group_files(partialGroups, (size, partialFuture.result()), fp)
+    for group in partialGroups.values():
+      if len(group) == 1:
+        fileKeys[group[0]] = "unique:" + group[0]
+      else:
+        fullJobs.extend([(fp, hashExecutor.submit(Utilities.hash_file, fp)) for fp in group])
+    for fp, hashFuture in fullJobs:
+      fileKeys[fp] = hashFuture.result()
+    return fileKeys
+
+  def _optimize_generate_file_hashes(self, liveryTitle, refPaths, fileKeys):
+    fileHashes = {}
+    for d, filepath in refPaths:
+      fileHash = fileKeys.get(filepath)
+      if fileHash:
+        d['hash'] = fileHash
+        if not fileHash in fileHashes.keys():
+          fileHashes[fileHash] = [liveryTitle]
+        else:
+          if liveryTitle not in fileHashes[fileHash]:
+            fileHashes[fileHash].append(liveryTitle)
     return fileHashes
 
   def _optimize_find_unused_livery_files(self, livery, liveryFilesData):
@@ -714,7 +1507,7 @@ class LiveryManager:
             unusedFiles.append(os.path.join(livery.destination, u, splitPath[-1]))
     return unusedFiles
 
-  def _optimize_correct_desc_lines(self, filesData, descLines, units, commentLine=False):
+  def _optimize_correct_desc_lines(self, livery, filesData, descLines, units, commentLine=False):
     optimizedLines = {}
     for t in descLines.keys():
       optimizedLines[t] = {}
@@ -724,47 +1517,43 @@ class LiveryManager:
       if not len(dL):
         continue
       for lU in dL.keys():
-        for line in dL[lU]:
-          if line[:2] == '--':
-            optimizedLines[t][lU].append(line)
-            continue
-          pyStatements = self._optimize_get_py_statements_from_line(line)
+        if not len(dL[lU]):
+          continue
+        descPath = os.path.join(os.getcwd(), livery.destination, lU, "description.lua")
+        fileLines, pyStatements = Utilities.read_description(descPath)
+        if not len(fileLines): # Not on disk anymore, keep what was read
+          optimizedLines[t][lU] = dL[lU]
+          continue
+        correctedStatements = []
+        for ps in pyStatements:
           optimizeStatement = False
-          for ps in pyStatements:
-            for l, fd in filesData['liveries'].items():
-              if ps[2] in fd.keys():
-                matchedData = fd[ps[2]]
-                if not 'hash' in matchedData.keys():
+          for l, fd in filesData['liveries'].items():
+            if ps[2] in fd.keys():
+              matchedData = fd[ps[2]]
+              if not 'hash' in matchedData.keys():
+                continue
+              if matchedData['hash'] in filesData['hashes'].keys():
+                matchedHash = filesData['hashes'][matchedData['hash']]
+                if t not in matchedHash:
                   continue
-                if matchedData['hash'] in filesData['hashes'].keys():
-                  matchedHash = filesData['hashes'][matchedData['hash']]
-                  if t not in matchedHash:
-                    continue
-                  if len(matchedHash) > 1:
-                    replacementTitle = matchedHash[0]
-                    fileStr = str.split(ps[2], "/")[-1]
-                    if replacementTitle == t:
-                      replacementPath = fileStr
-                    else:
-                      replacementPath = "../" + replacementTitle + "/" + fileStr
-                    ps[2] = replacementPath
-                    optimizeStatement = True
-                if len(units) > 1:
+                if len(matchedHash) > 1:
+                  replacementTitle = matchedHash[0]
+                  fileStr = str.split(ps[2], "/")[-1]
+                  if replacementTitle == t:
+                    replacementPath = fileStr
+                  else:
+                    replacementPath = "../" + replacementTitle + "/" + fileStr
+                  ps[2] = replacementPath
                   optimizeStatement = True
-          if not optimizeStatement:
-            optimizedLines[t][lU].append(line)
-          else:
-            if commentLine:
-              optimizedLines[t][lU].append("--" + line)
-            linePrefix = str.find(line, '{')
-            lastBracket = str.rfind(line, '}')
-            correctedLuaStatements = []
-            for ps in pyStatements:
-              ls = self._optimize_py_statement_to_lua(ps)
-              if len(ls):
-                correctedLuaStatements.append(ls)
-            correctedLuaLine = line[:linePrefix] + ' '.join(correctedLuaStatements) + line[lastBracket + 1:]
-            optimizedLines[t][lU].append(correctedLuaLine)
+              if len(units) > 1:
+                optimizeStatement = True
+          if optimizeStatement:
+            correctedStatements.append(ps)
+        if not len(correctedStatements):
+          optimizedLines[t][lU] = fileLines
+          continue
+        correctedText = self._optimize_replace_lua_statements(''.join(fileLines), correctedStatements, commentLine)
+        optimizedLines[t][lU] = correctedText.splitlines(keepends=True)
     return optimizedLines
 
   def _optimize_write_corrected_desc_files(self, livery, descLines, keepCopy=True):
@@ -778,6 +1567,7 @@ class LiveryManager:
           with open(descPath, "w") as descFile:
             self.print("Writing \'" + descPath + "\'", style="bold green")
             descFile.writelines(lines)
+          Utilities.invalidate_description(descPath)
 
   def _optimize_remove_unused_files(self, unusedData):
     for f in unusedData:
@@ -785,10 +1575,7 @@ class LiveryManager:
       Utilities.remove_file(fPath)
 
   def _optimize_get_desclines_from_description_file(self, descPath):
-    descLines = []
-    if os.path.isfile(descPath):
-      descLines = self._get_file_lines(descPath)
-    return descLines
+    return Utilities.read_description_lines(descPath)
 
   def _optimize_get_desclines_from_livery(self, livery):
     descLines = {}
@@ -811,7 +1598,8 @@ class LiveryManager:
       if t in descLines.keys():
         for p in descLines[t]:
           if 'data' not in l.keys() or not l['data']:
-            fileRefs = self._get_file_refs_from_description(descLines[t][p])
+            descPath = os.path.join(os.getcwd(), livery.destination, p, "description.lua")
+            fileRefs = self._get_file_refs_from_description(self._get_description_records(descPath))
             filesData[p] = fileRefs
           else:
             filesList = self._get_file_list_data_folder(livery, l)
@@ -834,19 +1622,29 @@ class LiveryManager:
         del filesData[p][mF]
     return filesData
 
-  def _optimize_calculate_fileref_hashes(self, livery, fileRefs):
+  def _optimize_calculate_fileref_hashes(self, livery, fileRefs, hashWorkers=None):
     filesData = {}
+    if not hashWorkers:
+      hashWorkers = self.get_config_workers("hash_workers")
+    liveryRefPaths = []
+    filePaths = []
     for t, l in livery.installs['liveries'].items():
       self.print("Generating file hashes for \'" + t + "\'", style="bold gold1")
       for p in l['paths']:
         installRoot = os.path.join(os.getcwd(), livery.destination, p)
         if p in fileRefs.keys():
-          fileHashes = self._optimize_generate_file_hashes(installRoot, t, fileRefs[p])
-          for fh, lf in fileHashes.items():
-            if fh not in filesData.keys():
-              filesData[fh] = lf
-            else:
-              filesData[fh].extend(lf)
+          refPaths = self._optimize_get_fileref_paths(installRoot, fileRefs[p])
+          liveryRefPaths.append((t, refPaths))
+          filePaths.extend([fp for d, fp in refPaths])
+    with ThreadPoolExecutor(max_workers=max(1, hashWorkers)) as hashExecutor:
+      fileKeys = self._optimize_hash_candidate_files(hashExecutor, list(dict.fromkeys(filePaths)))
+    for t, refPaths in liveryRefPaths:
+      fileHashes = self._optimize_generate_file_hashes(t, refPaths, fileKeys)
+      for fh, lf in fileHashes.items():
+        if fh not in filesData.keys():
+          filesData[fh] = lf
+        else:
+          filesData[fh].extend(lf)
     return filesData
 
   def _optimize_find_missing_files(self, liveryFileHashes, liveryFilesData):
@@ -859,12 +1657,123 @@ class LiveryManager:
           missingFiles[t].append(f + ".dds")
     return missingFiles
 
-  def optimize_livery(self, livery, removeUnused=False, copyDesc=False, verbose=False, checkOnly=False):
+  def _optimize_global_get_files(self, liveries):
+    imgFiletypes = ['.dds', '.tga', '.bmp', '.png', '.jpg']
+    inodeFiles = {}
+    for livery in liveries:
+      for t, l in livery.installs['liveries'].items():
+        for p in l['paths']:
+          installRoot = os.path.join(os.getcwd(), livery.destination, p)
+          for f in sorted(glob.glob(os.path.join(installRoot, "*.*"))):
+            if str.lower(os.path.splitext(f)[1]) not in imgFiletypes or not os.path.isfile(f):
+              continue
+            fileStat = os.stat(f)
+            fileID = (fileStat.st_dev, fileStat.st_ino) if fileStat.st_ino else f # Hardlinked paths share an ID
+            if fileID not in inodeFiles.keys():
+              inodeFiles[fileID] = {'paths': [], 'owners': {}, 'size': fileStat.st_size, 'nlink': fileStat.st_nlink}
+            if f not in inodeFiles[fileID]['paths']:
+              inodeFiles[fileID]['paths'].append(f)
+              inodeFiles[fileID]['owners'][f] = str(livery.dcsuf.id)
+    return inodeFiles
+
+  def _optimize_global_get_rewrite_canonical(self, inodeFiles, group, duplicateID, duplicatePath):
+    duplicateOwner = inodeFiles[duplicateID]['owners'][duplicatePath]
+    duplicateUnitRoot = os.path.split(os.path.split(duplicatePath)[0])[0]
+    for fileID in group:
+      if fileID == duplicateID:
+        continue
+      for p in inodeFiles[fileID]['paths']: # Only point at folders of the same livery so uninstalling it can't break another
+        if inodeFiles[fileID]['owners'][p] == duplicateOwner and os.path.split(os.path.split(p)[0])[0] == duplicateUnitRoot:
+          return p
+    return None
+
+  def _optimize_global_can_remove_reference(self, liveryRoot, fileStem):
+    unitRoot, liveryFolder = os.path.split(liveryRoot)
+    liveryRef = str.lower(liveryFolder + "/" + fileStem)
+    for siblingDesc in glob.glob(os.path.join(unitRoot, "*", "description.lua")):
+      if os.path.split(os.path.split(siblingDesc)[0])[1] == liveryFolder:
+        continue
+      if liveryRef in str.lower(''.join(self._optimize_get_desclines_from_description_file(siblingDesc))): # Another livery uses this file
+        return False
+    return True
+
+  def _optimize_global_rewrite_reference(self, canonicalPath, duplicatePath):
+    canonicalRoot, canonicalName = os.path.split(canonicalPath)
+    duplicateRoot, duplicateName = os.path.split(duplicatePath)
+    if os.path.split(canonicalRoot)[0] != os.path.split(duplicateRoot)[0]: # Only reachable with ../ in the same unit
+      return False
+    descPath = os.path.join(duplicateRoot, "description.lua")
+    duplicateStem = str.lower(os.path.splitext(duplicateName)[0])
+    if not os.path.isfile(descPath) or not self._optimize_global_can_remove_reference(duplicateRoot, duplicateStem):
+      return False
+    canonicalRef = "../" + os.path.split(canonicalRoot)[1] + "/"
+    descLines, pyStatements = Utilities.read_description(descPath)
+    correctedStatements = []
+    for ps in pyStatements:
+      if ps[3] or "/" in ps[2] or str.lower(os.path.splitext(ps[2])[0]) != duplicateStem:
+        continue
+      ps[2] = canonicalRef + (canonicalName if os.path.splitext(ps[2])[1] else os.path.splitext(canonicalName)[0])
+      correctedStatements.append(ps)
+    if not len(correctedStatements):
+      return False
+    correctedText = self._optimize_replace_lua_statements(''.join(descLines), correctedStatements)
+    with open(descPath, "w") as descFile:
+      descFile.write(correctedText)
+    Utilities.invalidate_description(descPath)
+    Utilities.remove_file(duplicatePath)
+    return True
+
+  def optimize_global(self, liveries, checkOnly=False, hashWorkers=None):
+    globalData = {'files': 0, 'duplicates': 0, 'linked': 0, 'rewritten': 0, 'reclaimed': 0, 'failed': []}
+    if not hashWorkers:
+      hashWorkers = self.get_config_workers("hash_workers")
+    inodeFiles = self._optimize_global_get_files(liveries)
+    globalData['files'] = sum([len(d['paths']) for d in inodeFiles.values()])
+    fileIDs = {d['paths'][0]: i for i, d in inodeFiles.items()}
+    with ThreadPoolExecutor(max_workers=max(1, hashWorkers)) as hashExecutor:
+      fileKeys = self._optimize_hash_candidate_files(hashExecutor, list(fileIDs.keys()))
+    hashGroups = {}
+    for fp, fileHash in fileKeys.items():
+      if fileHash and not fileHash.startswith("unique:"):
+        self._optimize_group_files(hashGroups, fileHash, fileIDs[fp])
+    for fileHash, group in hashGroups.items():
+      if len(group) < 2:
+        continue
+      canonicalID = max(group, key=lambda i: len(inodeFiles[i]['paths'])) # Keep the copy that's already most shared
+      canonicalPath = inodeFiles[canonicalID]['paths'][0]
+      for fileID in group:
+        if fileID == canonicalID:
+          continue
+        duplicateData = inodeFiles[fileID]
+        globalData['duplicates'] += len(duplicateData['paths'])
+        replacedAll = True
+        for duplicatePath in duplicateData['paths']:
+          if checkOnly:
+            continue
+          if Utilities.replace_with_link(canonicalPath, duplicatePath):
+            globalData['linked'] += 1
+            continue
+          rewriteCanonicalPath = self._optimize_global_get_rewrite_canonical(inodeFiles, group, fileID, duplicatePath)
+          if rewriteCanonicalPath and self._optimize_global_rewrite_reference(rewriteCanonicalPath, duplicatePath):
+            globalData['rewritten'] += 1
+          else:
+            replacedAll = False
+            globalData['failed'].append(duplicatePath)
+        if replacedAll and duplicateData['nlink'] <= len(duplicateData['paths']): # Links outside the library keep it
+          globalData['reclaimed'] += duplicateData['size']
+    if not checkOnly:
+      for livery in liveries:
+        livery.calculate_size_installed_liveries()
+      self.calculate_global_unique_sizes(list(self.Liveries.values())) # Links only change here, list reads the result
+    return globalData
+
+  def optimize_livery(self, livery, removeUnused=False, copyDesc=False, verbose=False, checkOnly=False,
+                      hashWorkers=None):
     if livery:
       filesData = {'liveries': {}, 'hashes': {}, 'same_hash':[], 'size': {} }
       descLines = self._optimize_get_desclines_from_livery(livery)
       filesData['liveries'] = self._optimize_get_filerefs_from_desclines(livery, descLines)
-      filesData['hashes'] = self._optimize_calculate_fileref_hashes(livery, filesData['liveries'])
+      filesData['hashes'] = self._optimize_calculate_fileref_hashes(livery, filesData['liveries'], hashWorkers)
       filesData['same_hash'] = [h for h,l in filesData['hashes'].items() if len(l) > 1]
       if len(filesData['same_hash']):
         self.print("Matched " + str(len(filesData['same_hash'])) + " files with the same hash.")
@@ -877,7 +1786,7 @@ class LiveryManager:
       livery.calculate_size_installed_liveries()
       filesData['size']['before'] = livery.get_size_installed_liveries()
       if (len(filesData['same_hash']) != 0 or len(livery.installs['units']) > 1) and not checkOnly:
-        correctedLines = self._optimize_correct_desc_lines(filesData, descLines, livery.installs['units'])
+        correctedLines = self._optimize_correct_desc_lines(livery, filesData, descLines, livery.installs['units'])
         self._optimize_write_corrected_desc_files(livery, correctedLines, keepCopy=copyDesc)
       if removeUnused or checkOnly:
         newDescLines = self._optimize_get_desclines_from_livery(livery)
@@ -8,6 +8,11 @@ class UnitManager:
     self.Units = {}
     self.Categories = ["Air", "Ground", "Sea"]
     self.UnitNames = {}
+    self.PartUnits = {}
+    self.GenericUnits = {}
+    self.FriendlyUnits = {}
+    self.DCSUFUnits = {}
+    self.LiveriesDirUnits = {}
 
   def setup_unitmanager(self):
     self.load_defaults()
@@ -23,6 +28,7 @@ class UnitManager:
         defaultUnit.dcsuf_unit = unitType
         self.Units[unitType][unitName] = defaultUnit
         self.UnitNames[unitName] = unitType
+    self.index_units()
 
   def load_custom(self):
     import glob
@@ -46,6 +52,38 @@ class UnitManager:
               self.Units[unitType][unitName] = customUnit
         except Exception as e:
           print("Failed to load unit config \'" + uF + "\'.")
+    self.index_units()
+
+  def index_units(self):
+    self.PartUnits = {}
+    self.GenericUnits = {}
+    self.FriendlyUnits = {}
+    self.DCSUFUnits = {}
+    for c in self.Categories:
+      if c in self.Units.keys():
+        for u,d in self.Units[c].items():
+          self.GenericUnits.setdefault(d.generic, d) # First match wins, same as the linear lookups did
+          self.FriendlyUnits.setdefault(d.friendly.lower(), d)
+          if d.dcs_files:
+            self.DCSUFUnits.setdefault(d.dcs_files, d)
+          for p in d.parts:
+            lowerPart = str.lower(p)
+            if not lowerPart in self.PartUnits.keys():
+              self.PartUnits[lowerPart] = {}
+            self.PartUnits[lowerPart][d] = self.PartUnits[lowerPart].get(d, 0) + 1
+    self.index_liveries_dirs()
+
+  def index_liveries_dirs(self):
+    primaryDirs = {}
+    self.LiveriesDirUnits = {}
+    for unitType in UnitDefaults.keys():
+      if unitType in self.Units.keys():
+        for u in self.Units[unitType].values():
+          for l in u.liveries:
+            self.LiveriesDirUnits[l] = u # Some units can install to other units (i.e. A-10)
+          if len(u.liveries):
+            primaryDirs.setdefault(u.liveries[0], u) # First element designates the actual unit
+    self.LiveriesDirUnits.update(primaryDirs)
 
   def create_unit_directories(self):
     dcslmRoot = os.path.join(os.getcwd(), "DCSLM")
@@ -85,45 +123,30 @@ class UnitManager:
     return False
 
   def get_unit_from_liveries_dir(self, liveryDir):
-    bestMatch = None
     if liveryDir and len(liveryDir):
-      lowerLiveryDir = str.lower(liveryDir)
-      for unitType in UnitDefaults.keys():
-        for u in self.Units[unitType].values():
-          if lowerLiveryDir in u.liveries:
-            if lowerLiveryDir == u.liveries[0]: # First element designates the actual unit
-              return u
-            else: # Some units can install to other units (i.e. A-10)
-              bestMatch = u
-    return bestMatch
+      return self.LiveriesDirUnits.get(str.lower(liveryDir))
+    return None
 
   def get_unit_from_generic_name(self, genericName):
     if genericName:
-      for c in self.Categories:
-        if c in self.Units.keys():
-          for u,d in self.Units[c].items():
-            if genericName == d.generic:
-              return d
+      return self.GenericUnits.get(genericName)
     return None
 
   def get_unit_from_friendly_name(self, friendlyName):
     if friendlyName:
-      for c in self.Categories:
-        if c in self.Units.keys():
-          for u,d in self.Units[c].items():
-            if friendlyName.lower() == d.friendly.lower():
-              return d
+      return self.FriendlyUnits.get(friendlyName.lower())
     return None
 
   def get_unit_from_dcsuf_text(self, dcsufText):
     if dcsufText:
-      for c in self.Categories:
-        if c in self.Units.keys():
-          for u,d in self.Units[c].items():
-            if dcsufText == d.dcs_files:
-              return d
+      return self.DCSUFUnits.get(dcsufText)
     return None
 
+  def get_units_from_part(self, partName):
+    if partName:
+      return self.PartUnits.get(str.lower(partName), {})
+    return {}
+
   def get_units_from_tags(self, tagsList):
     matchedUnits = []
     if tagsList and len(tagsList):
@@ -1,10 +1,93 @@
 import re
 import os
+import json
 import stat
 import hashlib
 import glob
 import shutil
-from requests import get
+import threading
+import requests
+
+try:
+  import fcntl
+except ImportError: # Not available on Windows
+  fcntl = None
+
+try:
+  import xxhash
+except ImportError:
+  xxhash = None
+
+FICLONE = 0x40049409
+FileInfoCache = {}
+FileInfoCacheLock = threading.Lock()
+FileHashCache = {}
+FileHashCacheLock = threading.Lock()
+FileHashCacheVersion = 2
+FileHashAlgorithms = ["md5", "sha1", "sha256", "blake2b", "xxh3"]
+FileHashAlgorithm = "md5"
+DescriptionCache = {}
+DescriptionCacheLock = threading.Lock()
+
+DescTokenPattern = re.compile(r"""
+  (?P<comment>--\[(?P<level>=*)\[.*?\](?P=level)\]|--\[=*\[.*|--[^\n]*)
+  |(?P<statement>\{\s*"(?P<part>(?:\\.|[^"\\\n])*)"\s*,\s*(?P<channel>[^\s,;{}"']+)\s*,
+    \s*"(?P<path>(?:\\.|[^"\\\n])*)"\s*,\s*(?P<absolute>\w+)\s*[,;]?\s*\})
+  |(?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+  |[^-"'{]+|.
+""", re.S | re.X)
+
+def tokenize_description(descText):
+  descRecords = []
+  for token in DescTokenPattern.finditer(descText):
+    if token.lastgroup != "statement": # Comments and strings are consumed whole so nothing inside them matches
+      continue
+    path = token.group("path")
+    if path.startswith('..'):
+      path = os.path.normpath(path).replace('\\', '/')
+    descRecords.append([token.group("part"), token.group("channel"), path,
+                        str.lower(token.group("absolute")) != "false", token.start(), token.end()])
+  return descRecords
+
+def _get_description_cache_entry(descPath):
+  cacheKey = _get_file_hash_cache_key(descPath)
+  fileStat = _get_file_hash_stat(descPath)
+  with DescriptionCacheLock:
+    cacheEntry = DescriptionCache.get(cacheKey)
+    if cacheEntry and _is_file_hash_entry_current(cacheEntry, fileStat):
+      return cacheEntry
+  with open(descPath, "r", errors="ignore") as descFile:
+    descLines = descFile.readlines()
+  cacheEntry = dict(fileStat)
+  cacheEntry['lines'] = descLines
+  cacheEntry['records'] = tokenize_description(''.join(descLines))
+  with DescriptionCacheLock:
+    DescriptionCache[cacheKey] = cacheEntry
+  return cacheEntry
+
+def read_description(descPath):
+  if os.path.isfile(descPath):
+    cacheEntry = _get_description_cache_entry(descPath) # Lines and records from one entry so the spans always line up
+    return list(cacheEntry['lines']), [list(r) for r in cacheEntry['records']]
+  return [], []
+
+def read_description_lines(descPath):
+  if os.path.isfile(descPath):
+    return list(_get_description_cache_entry(descPath)['lines'])
+  return []
+
+def read_description_records(descPath):
+  if os.path.isfile(descPath):
+    return [list(r) for r in _get_description_cache_entry(descPath)['records']] # Callers rewrite records in place
+  return []
+
+def invalidate_description(descPath):
+  with DescriptionCacheLock:
+    DescriptionCache.pop(_get_file_hash_cache_key(descPath), None)
+
+def clear_description_cache():
+  with DescriptionCacheLock:
+    DescriptionCache.clear()
 
 def find_desc_file_format(knownFilePath):
   detectedFormat = "dds"
@@ -13,14 +96,121 @@ def find_desc_file_format(knownFilePath):
     detectedFormat = matchedFiles[0].split(".", 1)[-1]
   return detectedFormat
 
-def hash_file(filePath):
+def make_file_hasher(algorithm=None):
+  if not algorithm:
+    algorithm = FileHashAlgorithm
+  if algorithm == "blake2b":
+    return hashlib.blake2b(digest_size=16)
+  if algorithm == "xxh3":
+    if not xxhash:
+      raise RuntimeError("Hash algorithm \'xxh3\' requires the \'xxhash\' package to be installed")
+    return xxhash.xxh3_128()
+  if algorithm in FileHashAlgorithms:
+    return hashlib.new(algorithm)
+  raise RuntimeError("Unknown file hash algorithm \'" + str(algorithm) + "\'")
+
+def set_file_hash_algorithm(algorithm):
+  global FileHashAlgorithm
+  make_file_hasher(algorithm)
+  FileHashAlgorithm = algorithm
+
+def _get_file_hash_cache_key(filePath):
+  return os.path.normcase(os.path.abspath(filePath))
+
+def _get_file_hash_stat(filePath):
+  fileStat = os.stat(filePath)
+  return {'size': fileStat.st_size, 'mtime': fileStat.st_mtime_ns, 'inode': fileStat.st_ino}
+
+def _is_file_hash_entry_current(cacheEntry, fileStat):
+  for k, v in fileStat.items():
+    if cacheEntry.get(k) != v:
+      return False
+  return True
+
+def _get_cached_file_hash(filePath, hashType):
+  fileStat = _get_file_hash_stat(filePath)
+  with FileHashCacheLock:
+    cacheEntry = FileHashCache.get(_get_file_hash_cache_key(filePath))
+    if cacheEntry and hashType in cacheEntry.keys() and _is_file_hash_entry_current(cacheEntry, fileStat):
+      return cacheEntry[hashType], fileStat
+  return None, fileStat
+
+def _set_cached_file_hash(filePath, fileStat, hashType, fileHash):
+  cacheKey = _get_file_hash_cache_key(filePath)
+  with FileHashCacheLock:
+    cacheEntry = FileHashCache.get(cacheKey)
+    if not cacheEntry or not _is_file_hash_entry_current(cacheEntry, fileStat): # File changed, drop old hashes
+      cacheEntry = dict(fileStat)
+      FileHashCache[cacheKey] = cacheEntry
+    cacheEntry[hashType] = fileHash
+
+def load_file_hash_cache(cachePath):
+  with FileHashCacheLock:
+    FileHashCache.clear()
+    if os.path.isfile(cachePath):
+      try:
+        with open(cachePath, "r") as cacheFile:
+          cacheData = json.load(cacheFile)
+          if cacheData.get('version') == FileHashCacheVersion:
+            FileHashCache.update({f: e for f, e in cacheData.get('files', {}).items() if isinstance(e, dict)})
+      except:
+        FileHashCache.clear() # Never keep half of a corrupt cache
+        raise RuntimeError("Unable to open file hash cache at \'" + cachePath + "\'")
+    return len(FileHashCache)
+
+def write_file_hash_cache(cachePath):
+  with FileHashCacheLock:
+    for f in [f for f in FileHashCache.keys() if not os.path.isfile(f)]: # Forget files that were removed
+      del FileHashCache[f]
+    try:
+      with open(cachePath + ".tmp", "w") as cacheFile:
+        json.dump({'version': FileHashCacheVersion, 'files': FileHashCache}, cacheFile)
+      os.replace(cachePath + ".tmp", cachePath)
+    except:
+      raise RuntimeError("Unable to write file hash cache to \'" + cachePath + "\'")
+    return len(FileHashCache)
+
+def hash_file(filePath, algorithm=None):
   if os.path.isfile(filePath):
-    with open(filePath, "rb") as hashFile:
-      hashData = hashFile.read()
-      fileHash = hashlib.md5(hashData).hexdigest()
-      return fileHash
+    hashType = algorithm if algorithm else FileHashAlgorithm # Cached per algorithm so switching never mixes them
+    fileHash, fileStat = _get_cached_file_hash(filePath, hashType)
+    if not fileHash:
+      fileHash = update_hash_from_file(make_file_hasher(hashType), filePath).hexdigest()
+      _set_cached_file_hash(filePath, fileStat, hashType, fileHash)
+    return fileHash
   return None
 
+def hash_file_partial(filePath, blockSize=64*1024, algorithm=None):
+  if not algorithm:
+    algorithm = FileHashAlgorithm
+  hashType = "partial_" + algorithm + "_" + str(blockSize)
+  partialHash, fileStat = _get_cached_file_hash(filePath, hashType)
+  if partialHash:
+    return partialHash
+  fileHash = make_file_hasher(algorithm)
+  with open(filePath, "rb") as hashFile:
+    fileHash.update(hashFile.read(blockSize))
+    hashFile.seek(max(0, os.fstat(hashFile.fileno()).st_size - blockSize))
+    fileHash.update(hashFile.read(blockSize))
+  partialHash = fileHash.hexdigest()
+  _set_cached_file_hash(filePath, fileStat, hashType, partialHash)
+  return partialHash
+
+def make_archive_hasher():
+  return hashlib.sha256()
+
+def update_hash_from_file(fileHash, filePath, bufferSize=1024*1024):
+  with open(filePath, "rb") as hashFile:
+    while True:
+      hashBuffer = hashFile.read(bufferSize)
+      if not hashBuffer:
+        break
+      fileHash.update(hashBuffer)
+  return fileHash
+
+def format_hash(fileHash):
+  return fileHash.name + ":" + fileHash.hexdigest()
+
 def correct_dcs_user_files_url(fileURL):
   DCSFilesURLRoot = "https://www.digitalcombatsimulator.com/en/files/"
   fileID = re.findall(r'[0-9]+', fileURL)
@@ -41,8 +231,41 @@ def mb_to_mb_string(sizeMegabytes):
 def mb_to_gb_string(sizeMegabytes):
   return "{:.2f}".format(sizeMegabytes/(10**3))
 
-def request_file_size(fileURL):
-  return int(get(fileURL, stream=True).headers['Content-length'])
+def _make_file_info(fileURL, headers):
+  return {
+    'url': fileURL,
+    'size': int(headers.get('Content-Length', 0)),
+    'etag': headers.get('ETag'),
+    'last_modified': headers.get('Last-Modified'),
+    'ranges': str.lower(headers.get('Accept-Ranges', "")) == "bytes"
+  }
+
+def clear_file_info_cache():
+  with FileInfoCacheLock:
+    FileInfoCache.clear()
+
+def request_file_info(fileURL, session=None):
+  with FileInfoCacheLock:
+    if fileURL in FileInfoCache.keys():
+      return FileInfoCache[fileURL]
+  reqObj = session if session else requests
+  fileInfo = None
+  try:
+    with reqObj.head(fileURL, allow_redirects=True, timeout=(10, 60)) as req:
+      if req.ok and 'Content-Length' in req.headers:
+        fileInfo = _make_file_info(fileURL, req.headers)
+  except (IOError, ValueError):
+    fileInfo = None
+  if not fileInfo: # Fall back to reading the headers of a GET for servers that don't answer HEAD properly
+    with reqObj.get(fileURL, stream=True, timeout=(10, 60)) as req:
+      req.raise_for_status()
+      fileInfo = _make_file_info(fileURL, req.headers)
+  with FileInfoCacheLock:
+    FileInfoCache[fileURL] = fileInfo
+  return fileInfo
+
+def request_file_size(fileURL, session=None):
+  return request_file_info(fileURL, session)['size']
 
 def validate_remove_path(filepath):
   if len(filepath):
@@ -80,6 +303,82 @@ def get_size_of_directory(dirPath):
     dirSize += get_size_of_filelist(dirFiles)
   return dirSize
 
+def _copy_file_range(srcPath, dstPath):
+  with open(srcPath, "rb") as srcFile, open(dstPath, "wb") as dstFile:
+    fileSize = os.fstat(srcFile.fileno()).st_size
+    copiedBytes = 0
+    while copiedBytes < fileSize:
+      rangeBytes = os.copy_file_range(srcFile.fileno(), dstFile.fileno(), fileSize - copiedBytes)
+      if rangeBytes == 0:
+        break
+      copiedBytes += rangeBytes
+    if copiedBytes != fileSize: # Some filesystems stop early (FUSE, NFS, overlays) or the file changed mid-copy
+      dstFile.truncate(0)
+      raise OSError("Short copy_file_range copy (" + str(copiedBytes) + "/" + str(fileSize) + " bytes)")
+  return copiedBytes
+
+def copy_file(srcPath, dstPath):
+  if hasattr(os, "copy_file_range"):
+    try:
+      copiedBytes = _copy_file_range(srcPath, dstPath)
+      shutil.copystat(srcPath, dstPath)
+      return copiedBytes
+    except OSError: # Not supported between these filesystems
+      pass
+  shutil.copy2(srcPath, dstPath) # Uses sendfile/fcopyfile/CopyFile2 where the platform has them
+  return os.path.getsize(dstPath)
+
+def get_unique_size_of_directory(dirPath, seenFiles):
+  dirSize = 0
+  if os.path.isdir(dirPath):
+    for dF in glob.glob(dirPath + "/**/*", recursive=True):
+      if os.path.isfile(dF):
+        fileStat = os.stat(dF)
+        fileID = (fileStat.st_dev, fileStat.st_ino)
+        if fileID not in seenFiles: # Hardlinked files only take up space once
+          seenFiles.add(fileID)
+          dirSize += fileStat.st_size
+  return dirSize
+
+def reflink_file(srcPath, dstPath):
+  if not fcntl:
+    return False
+  try:
+    with open(srcPath, "rb") as srcFile, open(dstPath, "wb") as dstFile:
+      fcntl.ioctl(dstFile.fileno(), FICLONE, srcFile.fileno())
+    return True
+  except OSError:
+    if os.path.isfile(dstPath):
+      os.remove(dstPath)
+    return False
+
+def link_file(srcPath, dstPath):
+  if os.path.isfile(dstPath):
+    os.remove(dstPath)
+  if reflink_file(srcPath, dstPath):
+    return "reflink"
+  try:
+    os.link(srcPath, dstPath)
+    return "hardlink"
+  except OSError:
+    shutil.copy2(srcPath, dstPath)
+    return "copy"
+
+def replace_with_link(srcPath, dstPath):
+  tempPath = dstPath + ".dcslm-link"
+  if os.path.isfile(tempPath):
+    os.remove(tempPath)
+  if reflink_file(srcPath, tempPath):
+    linkType = "reflink"
+  else:
+    try:
+      os.link(srcPath, tempPath)
+      linkType = "hardlink"
+    except OSError:
+      return None
+  os.replace(tempPath, dstPath)
+  return linkType
+
 def remove_readonly(func, path, _):
   os.chmod(path, stat.S_IWRITE)
   func(path)
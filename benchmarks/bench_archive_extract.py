@@ -0,0 +1,73 @@
+# Compares in-process archive extraction (zipfile/py7zr) against extracting through patool.
+# Usage: python benchmarks/bench_archive_extract.py [archive files...] [--repeat N]
+# With no archives a synthetic livery zip is generated so the script runs anywhere.
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import patoolib
+from DCSLM.LiveryManager import LiveryManager
+
+def make_synthetic_archive(archivePath, liveryCount, textureCount, textureSize):
+  with zipfile.ZipFile(archivePath, "w", compression=zipfile.ZIP_DEFLATED) as zipArchive:
+    for l in range(liveryCount):
+      liveryRoot = "Livery " + str(l) + "/"
+      descLines = ["livery = {\n"]
+      for t in range(textureCount):
+        textureName = "texture_" + str(t)
+        descLines.append("  {\"part_" + str(t) + "\", 0 ,\"" + textureName + "\", false};\n")
+        textureData = os.urandom(textureSize // 2) + bytes(textureSize - textureSize // 2) # Half compressible
+        zipArchive.writestr(liveryRoot + textureName + ".dds", textureData)
+      descLines.append("}\n")
+      zipArchive.writestr(liveryRoot + "description.lua", ''.join(descLines))
+      zipArchive.writestr(liveryRoot + "readme.txt", "Synthetic livery\n")
+
+def run_extract(extractFunc, archivePath, workRoot):
+  extractPath = tempfile.mkdtemp(dir=workRoot)
+  try:
+    extractFunc(archivePath, extractPath)
+  finally:
+    shutil.rmtree(extractPath, ignore_errors=True)
+
+def main():
+  argParser = argparse.ArgumentParser()
+  argParser.add_argument("archives", nargs="*")
+  argParser.add_argument("--repeat", type=int, default=3)
+  argParser.add_argument("--liveries", type=int, default=4)
+  argParser.add_argument("--textures", type=int, default=20)
+  argParser.add_argument("--texture-kb", type=int, default=1024)
+  args = argParser.parse_args()
+  lm = LiveryManager()
+  workRoot = tempfile.mkdtemp(prefix="dcslm_bench_")
+  try:
+    archives = args.archives
+    if not len(archives):
+      archivePath = os.path.join(workRoot, "synthetic_livery.zip")
+      make_synthetic_archive(archivePath, args.liveries, args.textures, args.texture_kb * 1024)
+      archives = [archivePath]
+    extractors = [
+      ("in-process", lambda a, e: lm._extract_archive_in_process(a, e) or patoolib.extract_archive(a, -1, e)),
+      ("in-process selective", lambda a, e: lm._extract_archive_in_process(a, e, selective=True) or
+                                            patoolib.extract_archive(a, -1, e)),
+      ("patool", lambda a, e: patoolib.extract_archive(a, -1, e))
+    ]
+    for archivePath in archives:
+      print("Archive: " + archivePath + " (" + "{:.1f}".format(os.path.getsize(archivePath) / (10**6)) + " MB)")
+      for extractorName, extractFunc in extractors:
+        try:
+          extractTime = min(timeit.repeat(lambda: run_extract(extractFunc, archivePath, workRoot), number=1,
+                                          repeat=args.repeat))
+          print("  " + extractorName + ": " + "{:.3f}".format(extractTime) + "s")
+        except Exception as e:
+          print("  " + extractorName + ": failed - " + str(e))
+  finally:
+    shutil.rmtree(workRoot, ignore_errors=True)
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main())
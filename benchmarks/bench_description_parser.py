@@ -0,0 +1,125 @@
+# Compares the single-pass description.lua tokenizer against the old per-line parser.
+# Usage: python benchmarks/bench_description_parser.py [Liveries dir or description.lua files...] [--repeat N]
+# With no paths a synthetic corpus is generated so the script runs anywhere.
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import DCSLM.Utilities as Utilities
+
+def old_get_lua_statements_from_line(line, commentStart=None, commentEnd=None):
+  if not commentStart:
+    commentStart = len(line) + 1
+  if not commentEnd:
+    commentEnd = -1
+  luaStatements = []
+  reStatement = re.findall("(.+[;\n])", line)
+  if len(reStatement):
+    for rs in reStatement:
+      luaStatement = str.strip(rs)
+      splitStatements = str.split(luaStatement, ';')
+      for s in splitStatements:
+        s = s[str.find(s, '{'):str.find(s, '}') + 1]
+        subStrStart = str.find(line, s)
+        if not (subStrStart > commentStart and subStrStart < commentEnd - 2) and len(s):
+          luaStatements.append(s)
+  return luaStatements
+
+def old_lua_statement_to_py(luaStatement):
+  luaData = []
+  splitStatement = str.split(luaStatement[1:-1], ',')
+  if len(splitStatement) == 4:
+    try:
+      splitStatement[0] = re.search("\".+\"", str.strip(splitStatement[0])).group()[1:-1]
+      splitStatement[1] = str.strip(str.strip(splitStatement[1]))
+      splitStatement[2] = re.search("\".+\"", str.strip(splitStatement[2])).group()[1:-1]
+      if splitStatement[2].startswith('..'):
+        splitStatement[2] = os.path.normpath(splitStatement[2]).replace('\\', '/')
+      splitStatement[3] = False if (str.lower(str.strip(splitStatement[3])) == "false") else True
+      luaData = splitStatement
+    except Exception:
+      return []
+  return luaData
+
+def old_get_py_statements_from_description(descLines):
+  inCommentBlock = False
+  pyStatements = []
+  for line in descLines:
+    commentStart = str.find(line, "--")
+    blockStart = str.find(line, "--[[")
+    if blockStart != -1:
+      blockStart -= 2
+      inCommentBlock = True
+    blockEnd = str.find(line, "]]")
+    if blockEnd > -1:
+      commentStart = str.find(line, "--", blockEnd - 2)
+      inCommentBlock = False
+    if commentStart < 0:
+      commentStart = len(line) + 1
+    if not inCommentBlock:
+      for ls in old_get_lua_statements_from_line(line, commentStart, blockEnd):
+        ps = old_lua_statement_to_py(ls)
+        if len(ps) == 4:
+          pyStatements.append(ps)
+  return pyStatements
+
+def new_get_py_statements_from_description(descLines):
+  return [r[:4] for r in Utilities.tokenize_description(''.join(descLines))]
+
+def find_description_files(paths):
+  descFiles = []
+  for p in paths:
+    if os.path.isfile(p):
+      descFiles.append(p)
+      continue
+    for root, dirs, files in os.walk(p):
+      for f in files:
+        if str.lower(f) == "description.lua":
+          descFiles.append(os.path.join(root, f))
+  return descFiles
+
+def generate_description_lines(statementCount):
+  descLines = ["livery = {\n"]
+  for i in range(statementCount):
+    if i % 25 == 0:
+      descLines.append("  -- Section " + str(i // 25) + "\n")
+    descLines.append("  {\"part_" + str(i % 40) + "\", " + ("DIFFUSE" if i % 2 else "0") +
+                     " ,\"texture_" + str(i) + "\", false};\n")
+  descLines.append("}\n")
+  descLines.append("name = \"Synthetic\"\n")
+  return descLines
+
+def main():
+  argParser = argparse.ArgumentParser()
+  argParser.add_argument("paths", nargs="*")
+  argParser.add_argument("--repeat", type=int, default=5)
+  argParser.add_argument("--synthetic-files", type=int, default=500)
+  argParser.add_argument("--synthetic-statements", type=int, default=120)
+  args = argParser.parse_args()
+  if len(args.paths):
+    corpus = []
+    for descPath in find_description_files(args.paths):
+      with open(descPath, "r", errors="ignore") as descFile:
+        corpus.append(descFile.readlines())
+    source = str(len(corpus)) + " description.lua files"
+  else:
+    corpus = [generate_description_lines(args.synthetic_statements) for i in range(args.synthetic_files)]
+    source = str(len(corpus)) + " synthetic files of " + str(args.synthetic_statements) + " statements"
+  if not len(corpus):
+    print("No description.lua files found")
+    return 1
+  oldCount = sum([len(old_get_py_statements_from_description(d)) for d in corpus])
+  newCount = sum([len(new_get_py_statements_from_description(d)) for d in corpus])
+  oldTime = min(timeit.repeat(lambda: [old_get_py_statements_from_description(d) for d in corpus], number=1, repeat=args.repeat))
+  newTime = min(timeit.repeat(lambda: [new_get_py_statements_from_description(d) for d in corpus], number=1, repeat=args.repeat))
+  print("Corpus: " + source)
+  print("Old per-line parser: " + "{:.4f}".format(oldTime) + "s, " + str(oldCount) + " statements")
+  print("Single-pass tokenizer: " + "{:.4f}".format(newTime) + "s, " + str(newCount) + " statements")
+  print("Speedup: " + "{:.2f}".format(oldTime / newTime) + "x")
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,81 @@
+# Measures file hashing throughput for each supported hash algorithm, single threaded and with a worker pool.
+# Usage: python benchmarks/bench_file_hashing.py [Liveries dir or files...] [--workers N] [--repeat N]
+# With no paths synthetic texture files are generated so the script runs anywhere. Files are read once
+# before timing, so the numbers are for a warm page cache.
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import DCSLM.Utilities as Utilities
+
+def find_files(paths):
+  foundFiles = []
+  for p in paths:
+    if os.path.isfile(p):
+      foundFiles.append(p)
+      continue
+    for root, dirs, files in os.walk(p):
+      for f in files:
+        if str.lower(os.path.splitext(f)[1]) in ['.dds', '.tga', '.bmp', '.png', '.jpg']:
+          foundFiles.append(os.path.join(root, f))
+  return foundFiles
+
+def make_synthetic_files(workRoot, fileCount, fileSize):
+  synthFiles = []
+  for i in range(fileCount):
+    filePath = os.path.join(workRoot, "texture_" + str(i) + ".dds")
+    with open(filePath, "wb") as synthFile:
+      synthFile.write(os.urandom(fileSize))
+    synthFiles.append(filePath)
+  return synthFiles
+
+def hash_files(algorithm, files, workers):
+  if workers <= 1:
+    return [Utilities.update_hash_from_file(Utilities.make_file_hasher(algorithm), f).hexdigest() for f in files]
+  with ThreadPoolExecutor(max_workers=workers) as hashExecutor:
+    return list(hashExecutor.map(lambda f: Utilities.update_hash_from_file(Utilities.make_file_hasher(algorithm),
+                                                                           f).hexdigest(), files))
+
+def main():
+  argParser = argparse.ArgumentParser()
+  argParser.add_argument("paths", nargs="*")
+  argParser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+  argParser.add_argument("--repeat", type=int, default=3)
+  argParser.add_argument("--files", type=int, default=32)
+  argParser.add_argument("--file-mb", type=int, default=8)
+  args = argParser.parse_args()
+  workRoot = tempfile.mkdtemp(prefix="dcslm_bench_")
+  try:
+    files = find_files(args.paths) if len(args.paths) else make_synthetic_files(workRoot, args.files,
+                                                                                args.file_mb * (1024**2))
+    if not len(files):
+      print("No texture files found")
+      return 1
+    totalMB = sum([os.path.getsize(f) for f in files]) / (1024**2)
+    for f in files: # Warm the page cache so every algorithm reads from memory
+      with open(f, "rb") as warmFile:
+        while warmFile.read(1024*1024):
+          pass
+    print("Files: " + str(len(files)) + " (" + "{:.1f}".format(totalMB) + " MB)")
+    for algorithm in Utilities.FileHashAlgorithms:
+      try:
+        Utilities.make_file_hasher(algorithm)
+      except RuntimeError as e:
+        print("  " + algorithm + ": skipped - " + str(e))
+        continue
+      results = []
+      for workers in [1, args.workers]:
+        hashTime = min(timeit.repeat(lambda: hash_files(algorithm, files, workers), number=1, repeat=args.repeat))
+        results.append("{:.0f}".format(totalMB / hashTime) + " MB/s (" + str(workers) + " workers)")
+      print("  " + algorithm + ": " + ", ".join(results))
+  finally:
+    shutil.rmtree(workRoot, ignore_errors=True)
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,71 @@
+# Compares detecting a livery's unit from its description parts through the part index against the old loop
+# over every unit's part list.
+# Usage: python benchmarks/bench_unit_parts.py [--descriptions N] [--parts N] [--repeat N]
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from DCSLM.UnitManager import UM
+from DCSLM.LiveryManager import LiveryManager
+
+def old_count_unit_parts(descParts):
+  unitPartsCount = {}
+  for p in descParts:
+    for c in UM.Categories:
+      if c in UM.Units.keys():
+        for u, d in UM.Units[c].items():
+          unitCount = 0
+          for uP in d.parts:
+            if uP == p:
+              unitCount += 1
+          if unitCount > 0:
+            if not d in unitPartsCount:
+              unitPartsCount[d] = unitCount
+            else:
+              unitPartsCount[d] += unitCount
+  return unitPartsCount
+
+def best_unit(unitPartsCount):
+  if len(unitPartsCount.keys()) > 0:
+    return max(unitPartsCount, key=unitPartsCount.get)
+  return None
+
+def make_description_parts(units, descCount, partCount, seed=0):
+  randomGen = random.Random(seed)
+  descriptions = []
+  for i in range(descCount):
+    unit = randomGen.choice(units)
+    unitParts = list(unit.parts)
+    descParts = randomGen.sample(unitParts, min(partCount, len(unitParts)))
+    descParts += ["custom_part_" + str(j) for j in range(max(0, partCount - len(descParts)))]
+    descriptions.append([str.lower(p) for p in descParts]) # Parts come out of descriptions lowercased
+  return descriptions
+
+def main():
+  argParser = argparse.ArgumentParser()
+  argParser.add_argument("--descriptions", type=int, default=2000)
+  argParser.add_argument("--parts", type=int, default=40)
+  argParser.add_argument("--repeat", type=int, default=3)
+  args = argParser.parse_args()
+  UM.load_defaults()
+  UM.index_units()
+  units = [d for c in UM.Categories if c in UM.Units.keys() for d in UM.Units[c].values() if len(d.parts)]
+  if not len(units):
+    print("No units with parts to detect")
+    return 1
+  lm = LiveryManager()
+  descriptions = make_description_parts(units, args.descriptions, args.parts)
+  mismatched = sum([1 for d in descriptions if best_unit(old_count_unit_parts(d)) != best_unit(lm._count_unit_parts(d))])
+  oldTime = min(timeit.repeat(lambda: [old_count_unit_parts(d) for d in descriptions], number=1, repeat=args.repeat))
+  newTime = min(timeit.repeat(lambda: [lm._count_unit_parts(d) for d in descriptions], number=1, repeat=args.repeat))
+  print("Units: " + str(len(units)) + ", descriptions: " + str(len(descriptions)) + " of " + str(args.parts) + " parts")
+  print("Old unit loop: " + "{:.4f}".format(oldTime) + "s")
+  print("Part index: " + "{:.4f}".format(newTime) + "s")
+  print("Speedup: " + "{:.1f}".format(oldTime / newTime) + "x, " + str(mismatched) + " detections differ")
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -4,6 +4,9 @@ import os
 import platform
 import shutil
 import sys
+import threading
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pprint import pprint
 from patoolib.util import get_nt_7z_dir
@@ -46,6 +49,38 @@ def clear_console():
   else:
     os.system('clear')
 
+class DCSLMConsole(Console):
+  def __init__(self, *args, **kwargs):
+    super().__init__(*args, **kwargs)
+    self.heldLock = threading.RLock()
+    self.heldThread = None
+    self.heldDepth = 0
+    self.heldOutput = []
+
+  def print(self, *args, **kwargs):
+    with self.heldLock:
+      if self.heldDepth and threading.current_thread() is not self.heldThread: # Keep worker output off an open prompt
+        self.heldOutput.append((args, kwargs))
+        return
+    super().print(*args, **kwargs)
+
+  def begin_held_output(self):
+    with self.heldLock:
+      if not self.heldDepth:
+        self.heldThread = threading.current_thread()
+      self.heldDepth += 1
+
+  def end_held_output(self):
+    with self.heldLock:
+      self.heldDepth = max(0, self.heldDepth - 1)
+      if not self.heldDepth:
+        self.heldThread = None
+        heldOutput = self.heldOutput
+        self.heldOutput = []
+        for args, kwargs in heldOutput: # Flushed under the lock so newer worker output stays in order
+          super().print(*args, **kwargs)
+
+
 class DCSLMApp:
   def __init__(self):
     self.console = None
@@ -233,6 +268,11 @@ class DCSLMApp:
             'desc': "Keep a copy of the original unmodified description.lua files",
             'action': "store_true"
           },
+          'global': {
+            'tags': ['-g', '--global'],
+            'desc': "Link identical image files shared between all given liveries to a single copy on disk",
+            'action': "store_true"
+          },
           'keepunused': {
             'tags': ['-u', '--keepunused'],
             'desc': "Keep unused files on disk at the end of optimization",
@@ -248,6 +288,11 @@ class DCSLMApp:
             'desc': "Verbose printing of livery file reference data for debugging purposes",
             'action': "store_true"
           },
+          'workers': {
+            'tags': ['-w', '--workers'],
+            'desc': "Number of files to hash at the same time (defaults to the \'hash_workers\' config setting)",
+            'action': "store"
+          },
         },
         'args': {
           'livery': {
@@ -543,13 +588,15 @@ class DCSLMApp:
     except SystemExit:
       raise RuntimeError("Unable to parse \'" + command + "\' command.")
 
-  def _install_get_livery_unitdata(self, liveryStrData, reqSession, forceInstall):
-    getUFStr = "Getting DCS User File information from " + liveryStrData['url']
-    with self.console.status(liveryStrData['progress'] + getUFStr):
-      livery = self.lm.get_livery_data_from_dcsuf_url(liveryStrData['url'], reqSession)
+  def _install_fetch_livery_dcsuf(self, liveryStrData, reqSession):
+    livery = self.lm.get_livery_data_from_dcsuf_url(liveryStrData['url'], reqSession)
     if not livery or (livery and not livery.dcsuf):
       raise RuntimeError("Unable to get DCSUF info from livery \'" + liveryStrData['str'] + "\'")
-    self.console.print(liveryStrData['progress'] + getUFStr + "\n")
+    return livery
+
+  def _install_get_livery_unitdata(self, liveryStrData, forceInstall):
+    livery = liveryStrData['livery']
+    self.console.print(liveryStrData['progress'] + "Got DCS User File information from " + liveryStrData['url'] + "\n")
     unitName = "Other"
     showDCSUFTags = True
     if "Other" != livery.dcsuf.dcsuf_unit and "Vehicle" != livery.dcsuf.dcsuf_unit:
@@ -581,37 +628,30 @@ class DCSLMApp:
       raise RuntimeError("No units selected for install.")
     return liveryUnitData['unit'], unitChoices
 
-  def _install_check_archive_path(self, livery, archiveName, progressStr, forceDownload):
-    archivePath = self.lm.does_archive_exist(archiveName)
-    liveryArchiveName = str(livery.dcsuf.id) + "_" + archiveName
-    if not archivePath:
-      archivePath = self.lm.does_archive_exist(liveryArchiveName)
-    if archivePath:
-      if not forceDownload and self.lm.compare_archive_sizes(archivePath, livery.dcsuf.download):
-        self.console.print(progressStr + "\nArchive file \'" + livery.dcsuf.download.split('/')[-1] + "\' for \'" +
-                           livery.dcsuf.title + "\' already exists. Using that instead.")
+  def _install_check_archive_path(self, livery, archiveName, progressStr, forceDownload, session=None):
+    archivePath = None
+    cachedArchive = self.lm.get_cached_archive(livery, pin=True) # Pinned so other installs can't evict it
+    if cachedArchive:
+      if not forceDownload and self.lm.compare_archive_sizes(cachedArchive['path'], livery.dcsuf.download, session):
+        self.console.print(progressStr + "\nArchive file \'" + archiveName + "\' for \'" + livery.dcsuf.title +
+                           "\' already exists. Using that instead.")
+        archivePath = cachedArchive['path']
+        livery.archive_hash = cachedArchive['hash']
       else:
-        archivePath = None
+        self.lm.unpin_cached_archive(cachedArchive['hash'])
     return archivePath
 
-  def _install_download_screenshots(self, livery, progressStr, session):
-    screenshotFiles = []
-    if len(livery.dcsuf.screenshots):
-      self.console.print("")
-      with self.console.status(progressStr + "[bold]Downloading " + str(len(livery.dcsuf.screenshots)) +
-                               " screenshots (--screenshots)..."):
-        screenshotFiles = self.lm.download_screenshots(livery, session=session)
-      self.console.print(progressStr + "Downloaded " + str(len(screenshotFiles)) + " screenshots.", style="bold")
-    return screenshotFiles
-
-  def _install_download_archive(self, livery, archivePath, progressStr, session, keepFiles):
+  def _install_download_archive(self, livery, archivePath, progressStr, session, keepFiles, downloadProgress=None,
+                                cancelEvent=None):
     if not archivePath:
       downloadStr = "Downloading livery archive file "
       if keepFiles:
         downloadStr += "and saving (--keep) "
       downloadStr += livery.dcsuf.download
       self.console.print("\n" + progressStr + downloadStr)
-      archivePath = self._download_archive_progress(livery, session=session)
+      archivePath = self._download_archive_progress(livery, session=session, downloadProgress=downloadProgress,
+                                                    cancelEvent=cancelEvent)
+      self.console.print(progressStr + "Downloaded livery archive file \'" + os.path.split(archivePath)[1] + "\'")
     return archivePath
 
   def _install_copy_screenshots(self, livery, screenshotFiles, destinationPath, progressStr=""):
@@ -680,17 +720,16 @@ class DCSLMApp:
         detectedUnits.append({'name': dL['name'], 'unit': unit, 'liveries':[]})
     return detectedUnits
 
-  def _install_liveries(self, liveryStrings, keepFiles=False, forceDownload=False, forceInstall=False,
-                        forceAllUnits=False, manualUnitSelection=False, verbose=False, screenshots=False):
-    installData = {'success': [], 'failed': []}
-    session = DCSUFParser().make_request_session()
-    extractedID = None
+  def _install_parse_livery_strings(self, liveryStrings, installData):
+    parsedStrData = []
     liveryIndex = 0
     for liveryStr in liveryStrings:
       liveryStrType = Utilities.determine_livery_string_location(liveryStr)
       liveryIndex += 1
       progressStr = "[" + str(liveryIndex) + "/" + str(len(liveryStrings)) + "] "
-      liveryStrData = {'str': liveryStr, 'type': liveryStrType, 'progress': progressStr, 'id': None}
+      liveryStrData = {'str': liveryStr, 'type': liveryStrType, 'progress': progressStr, 'id': None, 'livery': None,
+                       'future': None, 'screenshots': [], 'extracting': False, 'members': None,
+                       'pinned': None}
       if not liveryStrType:
         errorMsg = "Unable to determine livery string type from \'" + liveryStr + "\'."
         installData['failed'].append({'path': liveryStr, 'error': errorMsg})
@@ -708,133 +747,306 @@ class DCSLMApp:
       elif liveryStrType == "Archive":
         liveryStrData['path'] = os.path.normpath(liveryStr)
         liveryStrData['id'] = self.lm.get_next_local_livery_id()
-      livery = None
+        try:
+          liveryStrData['livery'] = self._install_archive_create_livery(liveryStrData)
+        except Exception as e:
+          installData['failed'].append({'path': liveryStr, 'error': e})
+          self.console.print(progressStr + str(e), style="err")
+          continue
+      parsedStrData.append(liveryStrData)
+    return parsedStrData
+
+  def _install_fetch_dcsuf_liveries(self, liveryStrDataList, installData, session, forceInstall, cancelEvent):
+    dcsufStrData = [l for l in liveryStrDataList if l['type'] == "DCSUF"]
+    fetchFutures = {}
+    if len(dcsufStrData):
+      fetchWorkers = self.lm.get_config_workers("fetch_workers")
+      fetchExecutor = ThreadPoolExecutor(max_workers=fetchWorkers)
       try:
-        extractedID = liveryStrData['id']
-        screenshotFiles = []
-        unitChoices = []
-        if liveryStrData['type'] == 'DCSUF':
-          livery, unitName, dcsufTags = self._install_get_livery_unitdata(liveryStrData, session, forceInstall)
-          archiveName = livery.dcsuf.download.split('/')[-1]
-          archivePath = self._install_check_archive_path(livery, archiveName, progressStr, forceDownload)
-          if screenshots:
-            screenshotFiles = self._install_download_screenshots(livery, progressStr, session)
-          archivePath = self._install_download_archive(livery, archivePath, progressStr, session, keepFiles)
-        else:
-          archivePath = liveryStrData['path']
-          livery = self._install_archive_create_livery(liveryStrData)
-        if archivePath:
-          livery.archive = archivePath
-          self.lm.remove_extracted_livery_archive(livery, extractedID=extractedID)
-          self.console.print("\n" + progressStr + "")
-          with self.console.status(progressStr + "[bold]Running extraction program on archive..."):
-            extractPath = self.lm.extract_livery_archive(livery, verbose=verbose)
-          if extractPath:
-            self.console.print("\n" + progressStr + "Extracted \'" + livery.archive + "\' to temporary directory.")
-            livery.ovgme = livery.generate_ovgme_folder()
-            destinationPath = self.lm.generate_livery_destination_path(livery)
-            livery.destination = destinationPath
-            self.console.print(progressStr + "Detecting extracted liveries...")
-            extractedLiveryFiles = self.lm.get_extracted_livery_files(livery, extractPath)
-            detectedLiveries = self.lm.detect_extracted_liveries(livery, extractPath, extractedLiveryFiles)
-            if not len(detectedLiveries):
-              raise RuntimeError(progressStr + "No liveries to install")
-            detectedUnits = self._install_detect_extracted_livery_units(livery, extractPath, detectedLiveries)
-            self._install_print_detected_units(livery, detectedUnits)
-            for i in range(0, len(detectedUnits)):
-              dU = detectedUnits[i]
-              dUnit = dU['unit']
-              if not dUnit:
-                unitInst = UM.get_unit_from_dcsuf_text(livery.dcsuf.dcsuf_unit)
-                if unitInst:
-                  dUnit = unitInst
-              try:
-                selectedUnit, dU['liveries'] = self._install_select_unit(livery, dU, manualUnitSelection, forceAllUnits)
-              except Exception as e:
-                self.console.print(e, style="warn")
-                continue
-              if dU['unit'] == None:
-                dU['unit'] = selectedUnit
-              if dU['unit'] != None:
-                if dU['unit'] not in unitChoices:
-                  unitChoices.append(detectedUnits[i]['unit'])
-                if dU['unit'] not in livery.dcsuf.unit:
-                  livery.dcsuf.unit.append(detectedUnits[i]['unit'])
-            if not len(unitChoices):
-              raise RuntimeError(progressStr + "No units to install liveries to")
-            if liveryStrData['type'] == 'Archive':
-              titlesList = self._install_archive_title_list(liveryStrData, detectedLiveries)
-              filledDCSUF, usedDCSUF = self.prompt_dcsuf_info(titlesList, livery=livery)
-              if filledDCSUF:
-                if not usedDCSUF:
-                  filledDCSUF.id = livery.dcsuf.id
-                  filledDCSUF.size = livery.dcsuf.size
-                  filledDCSUF.date = livery.dcsuf.date
-                  filledDCSUF.datetime = livery.dcsuf.datetime
-                  filledDCSUF.download = livery.dcsuf.download
-                livery.dcsuf = filledDCSUF
-                livery.installs['units'] = unitChoices
-            elif liveryStrData['type'] == 'DCSUF':
-              livery.installs['units'] = unitChoices
-            liveryNames = [l['name'] for l in detectedLiveries if not l['data']]
-            self.console.print(liveryNames)
-            self.console.print(progressStr + "Generating livery install paths...")
-            installPaths = self.lm.generate_livery_install_paths(livery, detectedUnits, detectedLiveries)
-            if len(installPaths):
-              uniqueUnits = set([u['unit'] for u in detectedUnits])
-              self.console.print(progressStr + "Installing " + str(len(detectedLiveries)) +
-                                 (" liveries" if len(detectedLiveries) > 1 else " livery") + " to " +
-                                 str(len(uniqueUnits)) + " aircraft.")
-              with self.console.status(progressStr + "Installing extracted liveries..."):
-                copiedLiveries = self.lm.copy_detected_liveries(livery, extractPath,
-                                                                extractedLiveryFiles, installPaths)
-              if len(copiedLiveries):
-                if screenshots:
-                  copiedFolderPath, copiedScreenshots = self._install_copy_screenshots(livery, screenshotFiles,
-                                                                                       destinationPath, progressStr)
-                  if len(copiedScreenshots):
-                    self.console.print(progressStr + "Downloaded " + str(len(copiedScreenshots)) +
-                                       " screenshots to \'" + copiedFolderPath + "\'")
-                with self.console.status(progressStr + "Writing registry files..."):
-                  self.lm.write_livery_registry_files(livery)
-                self.console.print(progressStr + "Wrote " + str(len(copiedLiveries)) +
-                                   " registry files to installed livery directories.")
-                self.lm.register_livery(livery)
-                self.console.print("[bold green]Livery[/bold green] \'" + str(livery.dcsuf.title) +
-                                   "\' [bold green]registered with ID[/bold green] " + str(livery.dcsuf.id) + "[bold green]!")
-                livery.calculate_size_installed_liveries()
-                installData['success'].append(livery)
-              else:
-                raise RuntimeError(progressStr + "Failed to copy livery files to install directories!")
-            else:
-              raise RuntimeError(progressStr + "Failed to detect valid livery directories from extracted livery archive!")
-          else:
-            raise RuntimeError(progressStr + "Failed to extract livery archive \'" + livery.archive + "\'.")
-      except KeyboardInterrupt as e:
-        installData['failed'].append({'path': liveryStr, 'error': e})
+        with self.console.status("Getting DCS User File information for " + str(len(dcsufStrData)) +
+                                 (" liveries..." if len(dcsufStrData) > 1 else " livery...")):
+          for l in dcsufStrData:
+            fetchFutures[l['progress']] = fetchExecutor.submit(self._install_fetch_livery_dcsuf, l, session)
+          futures.wait(fetchFutures.values())
+      except KeyboardInterrupt:
         self.console.print("Install exception: keyboard interrupt", style="err")
-      except Exception as e:
-        installData['failed'].append({'path': liveryStr, 'error': e})
-        self.console.print(e, style="err")
+        cancelEvent.set()
+        for l in liveryStrDataList:
+          installData['failed'].append({'path': l['str'], 'error': "Install cancelled by keyboard interrupt"})
+        return []
       finally:
-        if livery:
-          if livery.destination:
-            self.console.print(progressStr + "Removing temporarily extracted folder.")
-            if not self.lm.remove_extracted_livery_archive(livery, extractedID=extractedID):
-              failedExtractPath = os.path.join(os.getcwd(), self.lm.FolderRoot, "extract", str(livery.dcsuf.id))
-              failedMsg = "Failed to remove all extracted files to directory " + failedExtractPath
-              self.console.print(progressStr + failedMsg, style="red")
-              installData['failed'].append({'path': livery.dcsuf.id, 'error': failedMsg})
-          if livery.archive and not keepFiles and liveryStrType == "DCSUF":
-            self.console.print(progressStr + "Removing downloaded archive file \'" + os.path.split(livery.archive)[1] + "\'.")
-            self.lm.remove_downloaded_archive(livery, livery.archive)
-          if screenshots:
-            self.console.print(progressStr + "Removing temporarily created screenshots folder")
-            screenshotsFolder = os.path.join(os.getcwd(), self.lm.FolderRoot, "screenshots", str(livery.dcsuf.id))
-            if os.path.isdir(screenshotsFolder):
-              if Utilities.validate_remove_path(screenshotsFolder):
-                shutil.rmtree(screenshotsFolder, onerror=Utilities.remove_readonly)
-          self.console.print("")
+        fetchExecutor.shutdown(wait=False, cancel_futures=True) # Don't hold the REPL on in-flight requests
+    # Prompts for already installed liveries are collected up front so the download and extract stages never wait on them
+    readyStrData = []
+    for l in liveryStrDataList:
+      if l['type'] == "DCSUF":
+        try:
+          l['livery'] = fetchFutures[l['progress']].result()
+          self._install_get_livery_unitdata(l, forceInstall)
+        except KeyboardInterrupt as e:
+          installData['failed'].append({'path': l['str'], 'error': e})
+          self.console.print("Install exception: keyboard interrupt", style="err")
+          continue
+        except Exception as e:
+          installData['failed'].append({'path': l['str'], 'error': e})
+          self.console.print(l['progress'] + str(e), style="err")
+          continue
+      readyStrData.append(l)
+    return readyStrData
+
+  def _install_prepare_livery_archive(self, liveryStrData, stageLocks, session, downloadProgress, keepFiles=False,
+                                      forceDownload=False, verbose=False, screenshots=False):
+    livery = liveryStrData['livery']
+    progressStr = liveryStrData['progress']
+    if liveryStrData['type'] == 'DCSUF':
+      archiveName = livery.dcsuf.download.split('/')[-1]
+      with stageLocks['download']:
+        if stageLocks['cancel'].is_set():
+          raise RuntimeError(progressStr + "Install cancelled before downloading livery archive.")
+        archivePath = self._install_check_archive_path(livery, archiveName, progressStr, forceDownload, session)
+        if archivePath:
+          liveryStrData['pinned'] = livery.archive_hash
+        if screenshots and len(livery.dcsuf.screenshots):
+          liveryStrData['screenshots'] = self.lm.download_screenshots(livery, session=session)
+          self.console.print(progressStr + "Downloaded " + str(len(liveryStrData['screenshots'])) + " screenshots.",
+                             style="bold")
+        if not archivePath:
+          archivePath = self._install_download_archive(livery, archivePath, progressStr, session, keepFiles,
+                                                       downloadProgress, stageLocks['cancel'])
+          if keepFiles:
+            archivePath = self.lm.store_cached_archive(livery, archivePath, pin=True)
+            liveryStrData['pinned'] = livery.archive_hash
+    else:
+      archivePath = liveryStrData['path']
+    if not archivePath:
+      raise RuntimeError(progressStr + "Failed to get livery archive for \'" + str(livery.dcsuf.title) + "\'.")
+    livery.archive = archivePath
+    with stageLocks['extract']:
+      if stageLocks['cancel'].is_set():
+        raise RuntimeError(progressStr + "Install cancelled before extracting livery archive.")
+      liveryStrData['extracting'] = True
+      self.lm.remove_extracted_livery_archive(livery, extractedID=liveryStrData['id'])
+      if self.lm.get_config_value("direct_install"):
+        liveryStrData['members'] = self.lm.list_livery_archive(livery)
+      if liveryStrData['members'] is not None: # Livery files get installed straight from the archive
+        extractPath = self.lm.extract_livery_archive_descriptions(livery, liveryStrData['members'], verbose=verbose)
+        if extractPath:
+          self.console.print(progressStr + "Read " + str(len(liveryStrData['members'])) + " livery files from \'" +
+                             livery.archive + "\'.")
+        return extractPath
+      extractPath = self.lm.extract_livery_archive(livery, verbose=verbose)
+    if extractPath:
+      self.console.print(progressStr + "Extracted \'" + livery.archive + "\' to temporary directory.")
+    return extractPath
+
+  def _install_wait_for_livery_archive(self, liveryStrData, downloadProgress):
+    liveryFuture = liveryStrData['future']
+    if not liveryFuture.done():
+      self.console.print("\n" + liveryStrData['progress'] + "Waiting for livery archive of \'" +
+                         str(liveryStrData['livery'].dcsuf.title) + "\' to be downloaded and extracted...")
+      with downloadProgress:
+        futures.wait([liveryFuture])
+    return liveryFuture.result()
+
+  def _install_extracted_livery(self, liveryStrData, extractPath, forceAllUnits=False, manualUnitSelection=False,
+                                screenshots=False):
+    livery = liveryStrData['livery']
+    progressStr = liveryStrData['progress']
+    livery.ovgme = livery.generate_ovgme_folder()
+    destinationPath = self.lm.generate_livery_destination_path(livery)
+    livery.destination = destinationPath
+    self.console.print("\n" + progressStr + "Detecting extracted liveries...")
+    extractedLiveryFiles = self.lm.get_extracted_livery_files(livery, extractPath, liveryStrData['members'])
+    detectedLiveries = self.lm.detect_extracted_liveries(livery, extractPath, extractedLiveryFiles,
+                                                         liveryStrData['members'])
+    if not len(detectedLiveries):
+      raise RuntimeError(progressStr + "No liveries to install")
+    detectedUnits = self._install_detect_extracted_livery_units(livery, extractPath, detectedLiveries)
+    self._install_print_detected_units(livery, detectedUnits)
+    self.console.begin_held_output() # Download and extract workers keep running while the prompts are open
+    try:
+      self._install_prompt_livery_choices(liveryStrData, detectedUnits, detectedLiveries, forceAllUnits,
+                                          manualUnitSelection)
+    finally:
+      self.console.end_held_output()
+    liveryNames = [l['name'] for l in detectedLiveries if not l['data']]
+    self.console.print(liveryNames)
+    self.console.print(progressStr + "Generating livery install paths...")
+    installPaths = self.lm.generate_livery_install_paths(livery, detectedUnits, detectedLiveries)
+    if not len(installPaths):
+      raise RuntimeError(progressStr + "Failed to detect valid livery directories from extracted livery archive!")
+    uniqueUnits = set([u['unit'] for u in detectedUnits])
+    self.console.print(progressStr + "Installing " + str(len(detectedLiveries)) +
+                       (" liveries" if len(detectedLiveries) > 1 else " livery") + " to " +
+                       str(len(uniqueUnits)) + " aircraft.")
+    stagingPath = self.lm.begin_staged_install(livery)
+    try:
+      copiedLiveries = self._install_staged_livery_files(liveryStrData, extractPath, extractedLiveryFiles,
+                                                         installPaths, stagingPath, screenshots)
+      with self.console.status(progressStr + "Moving installed liveries into place..."):
+        self.lm.commit_staged_install(livery, stagingPath)
+    except BaseException:
+      self.lm.rollback_staged_install(livery)
+      raise
+    self.console.print(progressStr + "Wrote " + str(len(copiedLiveries)) +
+                       " registry files to installed livery directories.")
+    self.console.print("[bold green]Livery[/bold green] \'" + str(livery.dcsuf.title) +
+                       "\' [bold green]registered with ID[/bold green] " + str(livery.dcsuf.id) + "[bold green]!")
+    livery.calculate_size_installed_liveries()
+    return livery
+
+  def _install_prompt_livery_choices(self, liveryStrData, detectedUnits, detectedLiveries, forceAllUnits=False,
+                                     manualUnitSelection=False):
+    livery = liveryStrData['livery']
+    progressStr = liveryStrData['progress']
+    unitChoices = []
+    for i in range(0, len(detectedUnits)):
+      dU = detectedUnits[i]
+      dUnit = dU['unit']
+      if not dUnit:
+        unitInst = UM.get_unit_from_dcsuf_text(livery.dcsuf.dcsuf_unit)
+        if unitInst:
+          dUnit = unitInst
+      try:
+        selectedUnit, dU['liveries'] = self._install_select_unit(livery, dU, manualUnitSelection, forceAllUnits)
+      except Exception as e:
+        self.console.print(e, style="warn")
+        continue
+      if dU['unit'] == None:
+        dU['unit'] = selectedUnit
+      if dU['unit'] != None:
+        if dU['unit'] not in unitChoices:
+          unitChoices.append(detectedUnits[i]['unit'])
+        if dU['unit'] not in livery.dcsuf.unit:
+          livery.dcsuf.unit.append(detectedUnits[i]['unit'])
+    if not len(unitChoices):
+      raise RuntimeError(progressStr + "No units to install liveries to")
+    if liveryStrData['type'] == 'Archive':
+      titlesList = self._install_archive_title_list(liveryStrData, detectedLiveries)
+      filledDCSUF, usedDCSUF = self.prompt_dcsuf_info(titlesList, livery=livery)
+      if filledDCSUF:
+        if not usedDCSUF:
+          filledDCSUF.id = livery.dcsuf.id
+          filledDCSUF.size = livery.dcsuf.size
+          filledDCSUF.date = livery.dcsuf.date
+          filledDCSUF.datetime = livery.dcsuf.datetime
+          filledDCSUF.download = livery.dcsuf.download
+        livery.dcsuf = filledDCSUF
+        livery.installs['units'] = unitChoices
+    elif liveryStrData['type'] == 'DCSUF':
+      livery.installs['units'] = unitChoices
+
+  def _install_staged_livery_files(self, liveryStrData, extractPath, extractedLiveryFiles, installPaths, stagingPath,
+                                   screenshots=False):
+    livery = liveryStrData['livery']
+    progressStr = liveryStrData['progress']
+    installStatusStr = progressStr + "Installing extracted liveries..."
+    with self.console.status(installStatusStr) as installStatus:
+      copyCallback = {'exec': self._copy_livery_files_status_callback, 'status': installStatus, 'text': installStatusStr}
+      copiedLiveries = self.lm.copy_detected_liveries(livery, extractPath, extractedLiveryFiles, installPaths,
+                                                      liveryStrData['members'], copyCallback=copyCallback,
+                                                      stagingPath=stagingPath)
+    if not len(copiedLiveries):
+      raise RuntimeError(progressStr + "Failed to copy livery files to install directories!")
+    if screenshots:
+      copiedFolderPath, copiedScreenshots = self._install_copy_screenshots(livery, liveryStrData['screenshots'],
+                                                                           os.path.join(stagingPath,
+                                                                                        livery.destination),
+                                                                           progressStr)
+      if len(copiedScreenshots):
+        self.console.print(progressStr + "Downloaded " + str(len(copiedScreenshots)) + " screenshots to \'" +
+                           copiedFolderPath.replace(stagingPath, os.getcwd()) + "\'")
+    with self.console.status(progressStr + "Writing registry files..."):
+      self.lm.write_livery_registry_files(livery, stagingPath=stagingPath)
+    return copiedLiveries
+
+  def _install_cleanup_livery(self, liveryStrData, installData, keepFiles=False, screenshots=False):
+    livery = liveryStrData['livery']
+    progressStr = liveryStrData['progress']
+    if livery:
+      if liveryStrData['extracting']:
+        self.console.print(progressStr + "Removing temporarily extracted folder.")
+        failedExtractPath = os.path.join(os.getcwd(), self.lm.FolderRoot, "extract", str(liveryStrData['id']))
+        if not self.lm.remove_extracted_livery_archive(livery, extractedID=liveryStrData['id']) and \
+           os.path.exists(failedExtractPath):
+          failedMsg = "Failed to remove all extracted files to directory " + failedExtractPath
+          self.console.print(progressStr + failedMsg, style="red")
+          installData['failed'].append({'path': str(livery.dcsuf.id), 'error': failedMsg})
+      if livery.archive and not keepFiles and liveryStrData['type'] == "DCSUF" and \
+         not self.lm.is_cached_archive(livery.archive):
+        self.console.print(progressStr + "Removing downloaded archive file \'" + os.path.split(livery.archive)[1] + "\'.")
+        self.lm.remove_downloaded_archive(livery, livery.archive)
+      if liveryStrData['pinned']:
+        self.lm.unpin_cached_archive(liveryStrData['pinned'])
+        liveryStrData['pinned'] = None
+      if screenshots:
+        self.console.print(progressStr + "Removing temporarily created screenshots folder")
+        screenshotsFolder = os.path.join(os.getcwd(), self.lm.FolderRoot, "screenshots", str(livery.dcsuf.id))
+        if os.path.isdir(screenshotsFolder):
+          if Utilities.validate_remove_path(screenshotsFolder):
+            shutil.rmtree(screenshotsFolder, onerror=Utilities.remove_readonly)
+      self.console.print("")
+
+  def _install_liveries(self, liveryStrings, keepFiles=False, forceDownload=False, forceInstall=False,
+                        forceAllUnits=False, manualUnitSelection=False, verbose=False, screenshots=False):
+    installData = {'success': [], 'failed': []}
+    downloadWorkers = self.lm.get_config_workers("download_workers")
+    extractWorkers = self.lm.get_config_workers("extract_workers")
+    poolSize = max(self.lm.get_config_workers("fetch_workers"),
+                   downloadWorkers * self.lm.get_config_workers("download_segments"))
+    session = DCSUFParser().make_request_session(poolSize=poolSize)
+    Utilities.clear_file_info_cache()
+    parsedStrData = self._install_parse_livery_strings(liveryStrings, installData)
+    cancelEvent = threading.Event()
+    readyStrData = self._install_fetch_dcsuf_liveries(parsedStrData, installData, session, forceInstall, cancelEvent)
+    if not len(readyStrData) or cancelEvent.is_set():
+      return installData
+    # Downloads and extractions run ahead in worker threads while liveries are installed in order on this thread
+    stageLocks = {
+      'download': threading.BoundedSemaphore(downloadWorkers),
+      'extract': threading.BoundedSemaphore(extractWorkers),
+      'cancel': cancelEvent
+    }
+    downloadProgress = self._make_download_progress()
+    lookAhead = downloadWorkers + extractWorkers
+    prepareExecutor = ThreadPoolExecutor(max_workers=lookAhead)
+    prepareArgs = (stageLocks, session, downloadProgress)
+    prepareKwargs = {'keepFiles': keepFiles, 'forceDownload': forceDownload, 'verbose': verbose,
+                     'screenshots': screenshots}
+    try:
+      for l in readyStrData[:lookAhead]: # Only run a window ahead of installs so temp archives and extracts stay bounded
+        l['future'] = prepareExecutor.submit(self._install_prepare_livery_archive, l, *prepareArgs, **prepareKwargs)
+      for i, l in enumerate(readyStrData):
+        if stageLocks['cancel'].is_set():
+          installData['failed'].append({'path': l['str'], 'error': "Install cancelled by keyboard interrupt"})
+          self._install_cleanup_livery(l, installData, keepFiles=keepFiles, screenshots=screenshots)
+          continue
+        try:
+          extractPath = self._install_wait_for_livery_archive(l, downloadProgress)
+          if not extractPath:
+            raise RuntimeError(l['progress'] + "Failed to extract livery archive \'" + str(l['livery'].archive) + "\'.")
+          installedLivery = self._install_extracted_livery(l, extractPath, forceAllUnits=forceAllUnits,
+                                                           manualUnitSelection=manualUnitSelection,
+                                                           screenshots=screenshots)
+          installData['success'].append(installedLivery)
+        except KeyboardInterrupt as e:
+          installData['failed'].append({'path': l['str'], 'error': e})
+          self.console.print("Install exception: keyboard interrupt", style="err")
+          stageLocks['cancel'].set()
+          with self.console.status("Stopping livery downloads and extractions..."):
+            prepareExecutor.shutdown(wait=True, cancel_futures=True)
+        except Exception as e:
+          installData['failed'].append({'path': l['str'], 'error': e})
+          self.console.print(e, style="err")
+        finally:
+          self._install_cleanup_livery(l, installData, keepFiles=keepFiles, screenshots=screenshots)
+          if i + lookAhead < len(readyStrData) and not stageLocks['cancel'].is_set():
+            nextStrData = readyStrData[i + lookAhead]
+            nextStrData['future'] = prepareExecutor.submit(self._install_prepare_livery_archive, nextStrData,
+                                                           *prepareArgs, **prepareKwargs)
+    finally:
+      prepareExecutor.shutdown(wait=True, cancel_futures=True)
+      self.lm.flush_archive_cache()
     return installData
 
   def _install_prompt_unit_input(self):
@@ -1027,31 +1239,44 @@ class DCSLMApp:
       for l in uninstallData['failed']:
         self.console.print("\t" + l['livery'] + "[red]: " + str(l['error']))
 
+  def _check_livery_update(self, livery, dcsufParser, session):
+    if livery.dcsuf.id <= self.lm.IDLocalMax:
+      return {'livery': livery, 'update': False, 'skipped': True}
+    try:
+      reqDCSUF = dcsufParser.get_dcsuserfile_from_url(str(livery.dcsuf.id), session)
+      if reqDCSUF:
+        if livery.dcsuf.datetime < reqDCSUF.datetime:
+          return {'livery': livery, 'update': True, 'skipped': False}
+        return {'livery': livery, 'update': False, 'skipped': False}
+    except Exception as e:
+      return {'livery': livery, 'update': False, 'skipped': False, 'failed': "Failed to check update: " + str(e)}
+    return {'livery': livery, 'update': False, 'skipped': False, 'failed': "Failed to parse HTML"}
+
   def _check_all_liveries_updates(self, verbose=False):
-    liveryStatus = []
     checkProgress = Progress("[progress.description]{task.description}",
                              SpinnerColumn(spinner_name="dots"),
                              BarColumn(),
                              "{task.completed}/{task.total}",
                              console=self.console)
     checkTask = checkProgress.add_task("Checking liveries for updates", total=len(self.lm.Liveries.keys()))
+    registeredLiveries = list(self.lm.Liveries.values())
+    liveryStatus = [None] * len(registeredLiveries)
+    checkWorkers = self.lm.get_config_workers("check_workers")
     with checkProgress:
-      session = DCSUFParser().make_request_session()
-      for l in self.lm.Liveries.values():
-        if l.dcsuf.id <= self.lm.IDLocalMax:
-          liveryStatus.append({'livery': l, 'update': False, 'skipped': True})
-          continue
-        reqDCSUF = DCSUFParser().get_dcsuserfile_from_url(str(l.dcsuf.id), session)
-        if reqDCSUF:
-          if l.dcsuf.datetime < reqDCSUF.datetime:
-            liveryStatus.append({'livery': l, 'update': True, 'skipped': False})
-            if verbose:
-              checkProgress.print("Found update for livery \'" + l.dcsuf.title + "\'!")
-          else:
-            liveryStatus.append({'livery': l, 'update': False, 'skipped': False})
-        else:
-          liveryStatus.append({'livery': l, 'update': False, 'skipped': False, 'failed': "Failed to parse HTML"})
-        checkProgress.update(checkTask, advance=1)
+      dcsufParser = DCSUFParser()
+      session = dcsufParser.make_request_session(poolSize=checkWorkers)
+      with ThreadPoolExecutor(max_workers=checkWorkers) as checkExecutor:
+        checkFutures = {}
+        for i in range(0, len(registeredLiveries)):
+          checkFuture = checkExecutor.submit(self._check_livery_update, registeredLiveries[i], dcsufParser, session)
+          checkFutures[checkFuture] = i
+        for f in futures.as_completed(checkFutures.keys()):
+          checkStatus = f.result()
+          liveryStatus[checkFutures[f]] = checkStatus
+          if verbose and checkStatus['update']:
+            checkProgress.print("Found update for livery \'" + checkStatus['livery'].dcsuf.title + "\'!")
+          checkProgress.update(checkTask, advance=1)
+      session.close()
     return liveryStatus
 
   def check_liveries(self):
@@ -1121,7 +1346,7 @@ class DCSLMApp:
         return
     liveryRows = []
     longestUnit = ""
-    footerData = {'size': 0, 'units': [], 'installed': 0, 'registered': 0}
+    footerData = {'size': 0, 'unique': 0, 'units': [], 'installed': 0, 'registered': 0}
     multipleUnitRows = []
     for l in self.lm.Liveries.values():
       unitData = l.dcsuf.unit
@@ -1131,7 +1356,13 @@ class DCSLMApp:
         friendlyUnit = "Multiple (" + str(len(unitData)) + ")"
       unitStr = friendlyUnit
       liverySizeMB = Utilities.bytes_to_mb(l.get_size_installed_liveries())
+      liveryUniqueMB = Utilities.bytes_to_mb(l.get_unique_size_installed_liveries())
       footerData['size'] += liverySizeMB
+      globalUniqueSize = l.get_global_unique_size_installed_liveries() # Deduped across liveries by optimize --global
+      if globalUniqueSize is None:
+        footerData['unique'] += liveryUniqueMB
+      else:
+        footerData['unique'] += Utilities.bytes_to_mb(globalUniqueSize)
       footerData['registered'] += 1
       footerData['installed'] += l.get_num_liveries()
       for u in l.dcsuf.unit:
@@ -1140,16 +1371,19 @@ class DCSLMApp:
       sizeStr = Utilities.mb_to_mb_string(liverySizeMB)
       if l.is_optimized():
         sizeStr = "[size.opt]" + sizeStr + "[/size.opt]"
+      uniqueStr = Utilities.mb_to_mb_string(liveryUniqueMB) if liveryUniqueMB < liverySizeMB else ""
       if len(unitData) == 1:
-        liveryRows.append((unitStr, str(l.dcsuf.id), l.dcsuf.title, sizeStr))
+        liveryRows.append((unitStr, str(l.dcsuf.id), l.dcsuf.title, sizeStr, uniqueStr))
       else:
-        multipleUnitRows.append((unitStr, str(l.dcsuf.id), l.dcsuf.title, sizeStr))
+        multipleUnitRows.append((unitStr, str(l.dcsuf.id), l.dcsuf.title, sizeStr, uniqueStr))
       if len(unitStr) > len(longestUnit):
         longestUnit = unitStr
     footerString = "[num]" + str(footerData['registered']) + "[/num] Registered Liveries    "
     footerString += "[num]" + str(footerData['installed']) + "[/num] Installed Livery Directories    "
     footerString += "[num]" + str(len(footerData['units'])) + "[/num] Units    "
     footerString += "[size]" + Utilities.mb_to_mb_string(footerData['size']) + "[/size] MB Total Size"
+    if footerData['unique'] < footerData['size']: # Linked files are shared across units and liveries
+      footerString += " ([size]" + Utilities.mb_to_mb_string(footerData['unique']) + "[/size] MB Unique)"
     unitColWidth = max(8, min(13, len(longestUnit)))
     statusTable = Table(title="List of Registered Liveries", expand=False, box=box.ROUNDED, highlight=False,
                         caption=footerString, caption_justify="center")
@@ -1157,6 +1391,9 @@ class DCSLMApp:
     statusTable.add_column("ID", justify="center", no_wrap=True, style="sky_blue1", width=9)
     statusTable.add_column("Livery Title", justify="center", no_wrap=True, overflow='ellipsis', max_width=72)
     statusTable.add_column("Size (MB)", justify="right", no_wrap=True, style="size", width=10)
+    showUnique = any([r[4] for r in liveryRows + multipleUnitRows]) # Only when some liveries have linked files
+    if showUnique:
+      statusTable.add_column("Unique (MB)", justify="right", no_wrap=True, style="size", width=11)
     liveryRows.sort(key=sort_list_by_unit_then_title)
     liveryRows.extend(multipleUnitRows)
     for i in range(0, len(liveryRows)):
@@ -1173,7 +1410,7 @@ class DCSLMApp:
             isEndSection = False
       if i == len(liveryRows) - 1: # for footer
         isEndSection = True
-      statusTable.add_row(*l, end_section=isEndSection)
+      statusTable.add_row(*(l if showUnique else l[:4]), end_section=isEndSection)
     self.console.print(statusTable)
 
   def _make_livery_rendergroup(self, livery):
@@ -1184,6 +1421,8 @@ class DCSLMApp:
     if os.path.isfile(livery.archive):
       archiveStyle = "[green]"
     liveryTable.add_row("Archive", archiveStyle + livery.archive)
+    if livery.archive_hash:
+      liveryTable.add_row("Archive Hash", livery.archive_hash)
     if self.lm.LiveryData['config']['ovgme']:
       liveryTable.add_row("Mod Managed Directory", livery.ovgme)
     liveryTable.add_row("Destination", livery.destination)
@@ -1550,7 +1789,7 @@ class DCSLMApp:
       taskFilename = upgradeFilename + " (v" + fileVersion + ")"
     dlTask = downloadProgress.add_task("download", filename=taskFilename, start=False)
     dlSize = Utilities.request_file_size(fileURL)
-    downloadProgress.update(dlTask, total=dlSize)
+    downloadProgress.update(dlTask, total=dlSize if dlSize else None)
     callbackData = { 'exec': self._download_archive_rich_callback, 'progress': downloadProgress, 'task': dlTask }
     with downloadProgress:
       try:
@@ -1727,6 +1966,11 @@ class DCSLMApp:
     sArgs = self._remove_brackets_sArgs(sArgs)
     optimizeArgs = self._parse_command_args("optimize", sArgs)
     removeFiles = not optimizeArgs.keepunused
+    hashWorkers = None
+    if optimizeArgs.workers:
+      if not str.isnumeric(optimizeArgs.workers) or int(optimizeArgs.workers) < 1:
+        raise RuntimeWarning("Invalid number of workers \'" + optimizeArgs.workers + "\' for \'optimize\' command.")
+      hashWorkers = int(optimizeArgs.workers)
     optimizationReports = []
     liveryIDs = []
     if len(optimizeArgs.livery) and str.lower(optimizeArgs.livery[0]) == "all":
@@ -1744,6 +1988,11 @@ class DCSLMApp:
     if not len(liveryIDs):
       self.console.print("No liveries given to \'optimize\' command.")
       return
+    with self.console.status("Loading file hash cache..."):
+      self.lm.load_file_hash_cache()
+    if getattr(optimizeArgs, 'global'):
+      self._optimize_global(liveryIDs, optimizeArgs.check, hashWorkers)
+      return
     liveryIndex = 0
     for l in liveryIDs:
       livery = self.lm.get_registered_livery(id=l)
@@ -1756,7 +2005,7 @@ class DCSLMApp:
           else:
             self.console.print(progressStr + "Checking livery optimization (--check) \'" + livery.dcsuf.title + "\'")
           filesData = self.lm.optimize_livery(livery, copyDesc=optimizeArgs.keepdesc, removeUnused=removeFiles,
-                                              checkOnly=optimizeArgs.check)
+                                              checkOnly=optimizeArgs.check, hashWorkers=hashWorkers)
           if filesData:
             if not optimizeArgs.check:
               livery.installs['optimized'] = True
@@ -1787,6 +2036,8 @@ class DCSLMApp:
           self.console.print(progressStr + "Skipping re-optimizing livery \'" + livery.dcsuf.title + "\'.")
       else:
         self.console.print(progressStr + "[red]No livery found for input \'" + l + "\'.")
+    with self.console.status("Writing file hash cache..."):
+      self.lm.write_file_hash_cache()
     if not optimizeArgs.check:
       with self.console.status("Updating livery .dcslm files..."):
         for op in optimizationReports:
@@ -1795,6 +2046,40 @@ class DCSLMApp:
         self.lm.write_data()
     self._print_optimization_report(optimizationReports)
 
+  def _optimize_global(self, liveryIDs, checkOnly, hashWorkers):
+    liveries = []
+    for l in liveryIDs:
+      livery = self.lm.get_registered_livery(id=l)
+      if livery:
+        liveries.append(livery)
+      else:
+        self.console.print("[red]No livery found for input \'" + l + "\'.")
+    if not len(liveries):
+      return
+    statusStr = "Checking" if checkOnly else "Linking"
+    with self.console.status(statusStr + " identical files across " + str(len(liveries)) + " liveries..."):
+      globalData = self.lm.optimize_global(liveries, checkOnly=checkOnly, hashWorkers=hashWorkers)
+    with self.console.status("Writing file hash cache..."):
+      self.lm.write_file_hash_cache()
+    globalReportStr = "Scanned " + str(globalData['files']) + " image files across " + str(len(liveries)) + \
+                      " liveries and found " + str(globalData['duplicates']) + " duplicate files."
+    if checkOnly:
+      globalReportStr += " Linking them could reclaim [bold green]" + \
+                         Utilities.bytes_to_mb_string(globalData['reclaimed']) + "[/bold green] Mb."
+    else:
+      globalReportStr += " Linked " + str(globalData['linked']) + " files and redirected " + \
+                         str(globalData['rewritten']) + " description.lua references, reclaiming [bold green]" + \
+                         Utilities.bytes_to_mb_string(globalData['reclaimed']) + "[/bold green] Mb."
+    self.console.print(globalReportStr)
+    if len(globalData['failed']):
+      self.console.print("[red]Unable to link or redirect " + str(len(globalData['failed'])) + " files:")
+      self.console.print(globalData['failed'])
+    if not checkOnly:
+      with self.console.status("Updating livery .dcslm files..."):
+        for l in liveries:
+          self.lm.write_livery_registry_files(l)
+        self.lm.write_data()
+
   def _make_unit_panel(self, unitData):
     unitTable = Table.grid(expand=False, padding=(0, 2, 2, 0))
     unitTable.add_column("Info", justify="right", no_wrap=True, style="sky_blue1")
@@ -2185,7 +2470,7 @@ class DCSLMApp:
     self.theme = dcslmTheme
 
   def setup_console_window(self):
-    self.console = Console(tab_size=4, theme=self.theme)
+    self.console = DCSLMConsole(tab_size=4, theme=self.theme)
 
   def setup_livery_manager(self):
     self.console.print("DCSLM.exe Directory: \'" + os.getcwd() + "\'")
@@ -2203,6 +2488,26 @@ class DCSLMApp:
     else:
       self.console.print("Loaded Livery Manager config and data from \'[exe]DCSLM[/exe]\\dcslm.json\'")
       self.lm.LiveryData = lmData
+    self._recover_staged_installs()
+    if not self.lm.ArchiveCache.has_index():
+      with self.console.status("Indexing saved archives in \'DCSLM\\archives\'..."):
+        self.lm.load_archive_cache()
+    else:
+      self.lm.load_archive_cache()
+
+  def _recover_staged_installs(self):
+    try:
+      recoveredInstalls = self.lm.recover_staged_installs()
+    except Exception as e: # Don't keep DCSLM from starting, the journal is left in place to retry next launch
+      self.console.print("Failed to recover interrupted livery installs from " +
+                         "\'[exe]DCSLM[/exe]\\install_journal.json\': " + str(e), style="err")
+      return
+    for r in recoveredInstalls:
+      if r['action'] == "finished":
+        self.console.print("Finished interrupted install of \'" + str(r['title']) + "\' (ID " + r['id'] + ").",
+                           style="bold gold1")
+      else:
+        self.console.print("Rolled back interrupted install of livery ID " + r['id'] + ".", style="bold gold1")
 
   def setup_unit_manager(self):
     UM.setup_unitmanager()
@@ -2301,18 +2606,14 @@ class DCSLMApp:
     self.lm.LiveryData['last_update'] = datetime.timestamp(datetime.now())
 
   def _print_archives_motd(self):
-    archivesPath = os.path.join(os.getcwd(), "DCSLM", "archives")
-    with self.console.status("Calculating size of archives directory..."):
-      if os.path.isdir(archivesPath):
-        archivesFiles = glob.glob(archivesPath + "/*.*")
-        if len(archivesFiles):
-          archivesSize = Utilities.get_size_of_filelist(archivesFiles) >> 20
-          if archivesSize > 0:
-            if archivesSize >= 1000:
-              sizeStr = Utilities.mb_to_gb_string(archivesSize) + " [bold gold1]GB[/bold gold1]"
-            else:
-              sizeStr = Utilities.mb_to_mb_string(archivesSize) + " [bold gold1]MB[/bold gold1]"
-            self.console.print(str(len(archivesFiles)) + " saved archives in \'DCSLM\\archives\' (" + sizeStr + ")")
+    archivesCount, archivesSize = self.lm.get_archive_cache_stats()
+    if archivesCount:
+      archivesSize = Utilities.bytes_to_mb(archivesSize)
+      if archivesSize >= 1000:
+        sizeStr = Utilities.mb_to_gb_string(archivesSize) + " [bold gold1]GB[/bold gold1]"
+      else:
+        sizeStr = Utilities.mb_to_mb_string(archivesSize) + " [bold gold1]MB[/bold gold1]"
+      self.console.print(str(archivesCount) + " saved archives in \'DCSLM\\archives\' (" + sizeStr + ")")
 
   def _print_num_liveries_motd(self):
     liveryMB = self.lm.get_size_registered_liveries()
@@ -2328,20 +2629,42 @@ class DCSLMApp:
       self._print_archives_motd()
 
   def _download_archive_rich_callback(self, dlCallback, downloadedBytes):
+    if 'cancel' in dlCallback.keys() and dlCallback['cancel'] and dlCallback['cancel'].is_set():
+      raise KeyboardInterrupt("Download cancelled")
     dlCallback['progress'].update(dlCallback['task'], advance=downloadedBytes)
 
-  def _download_archive_progress(self, livery, session=None):
-    downloadProgress = Progress(TextColumn("[bold blue]{task.fields[filename]}", justify="right"),
-                                BarColumn(bar_width=None),"[progress.percentage]{task.percentage:>3.1f}%",
-                                "•",DownloadColumn(), "•", TransferSpeedColumn(), "•",TimeRemainingColumn(),
-                                console=self.console)
+  def _copy_livery_files_status_callback(self, copyCallback, copiedBytes, elapsedTime):
+    copySpeed = Utilities.bytes_to_mb(copiedBytes) / max(elapsedTime, 0.001)
+    copyCallback['status'].update(copyCallback['text'] + " " + Utilities.bytes_to_mb_string(copiedBytes) +
+                                  " MB (" + Utilities.mb_to_mb_string(copySpeed) + " MB/s)")
+
+  def _make_download_progress(self):
+    return Progress(TextColumn("[bold blue]{task.fields[filename]}", justify="right"),
+                    BarColumn(bar_width=None),"[progress.percentage]{task.percentage:>3.1f}%",
+                    "•",DownloadColumn(), "•", TransferSpeedColumn(), "•",TimeRemainingColumn(),
+                    console=self.console)
+
+  def _download_archive_progress(self, livery, session=None, downloadProgress=None, cancelEvent=None):
+    sharedProgress = downloadProgress is not None
+    if not sharedProgress:
+      downloadProgress = self._make_download_progress()
     archiveName = livery.dcsuf.download.split('/')[-1]
     dlTask = downloadProgress.add_task("download", filename=archiveName, start=False)
-    dlSize = Utilities.request_file_size(livery.dcsuf.download)
-    downloadProgress.update(dlTask, total=dlSize)
-    callbackData = { 'exec': self._download_archive_rich_callback, 'progress': downloadProgress, 'task': dlTask }
-    with downloadProgress:
-      archivePath =  self.lm.download_livery_archive(livery, dlCallback=callbackData, session=session)
+    dlSize = Utilities.request_file_size(livery.dcsuf.download, session)
+    downloadProgress.update(dlTask, total=dlSize if dlSize else None)
+    callbackData = { 'exec': self._download_archive_rich_callback, 'progress': downloadProgress, 'task': dlTask,
+                     'cancel': cancelEvent }
+    dlSegments = self.lm.get_config_workers("download_segments")
+    if sharedProgress: # Shared progress is only displayed while the install is waiting on a download
+      try:
+        archivePath = self.lm.download_livery_archive(livery, dlCallback=callbackData, session=session,
+                                                      segments=dlSegments)
+      finally:
+        downloadProgress.remove_task(dlTask)
+    else:
+      with downloadProgress:
+        archivePath = self.lm.download_livery_archive(livery, dlCallback=callbackData, session=session,
+                                                      segments=dlSegments)
     return archivePath
 
   def print_parts(self, sArgs):
@@ -2353,8 +2676,7 @@ class DCSLMApp:
           for p in l['paths']:
             liveryPath = os.path.join(os.getcwd(), livery.destination, p)
             descPath = os.path.join(liveryPath, "description.lua")
-            descLines = self.lm._optimize_get_desclines_from_description_file(descPath)
-            descParts = self.lm._get_parts_from_description(descLines)
+            descParts = self.lm._get_parts_from_description(self.lm._get_description_records(descPath))
             pprint(descParts)
 
   def reload_dcslm_config(self):